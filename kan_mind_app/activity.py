@@ -0,0 +1,80 @@
+"""
+Activity log of boards.
+
+Views call `record()` for every change. During a request the events are
+collected by `ActivityLogMiddleware` and written with one `bulk_create`
+after the view has finished; outside of requests (workers, shell) they are
+written when the surrounding transaction commits.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+
+from django.db import transaction
+
+from .models import TaskEvent
+from .sharding import db_for_board
+
+TASK_FIELDS = ('title', 'description', 'status', 'priority', 'assignee_id', 'reviewer_id', 'due_date')
+
+_buffer = ContextVar('kanmind_activity_buffer', default=None)
+
+
+def record(board_id, verb, actor=None, task_id=None, **data):
+    """Queues an activity event for the board."""
+    event = TaskEvent(board_id=board_id, task_id=task_id, actor=actor, verb=verb, data=data)
+    events = _buffer.get()
+    if events is None:
+        using = db_for_board(board_id)
+        transaction.on_commit(lambda: TaskEvent.objects.using(using).bulk_create([event]), using=using)
+    else:
+        events.append(event)
+
+
+@contextmanager
+def buffered():
+    """Collects the events recorded inside the block and yields the list."""
+    token = _buffer.set([])
+    try:
+        yield _buffer.get()
+    finally:
+        _buffer.reset(token)
+
+
+def flush(events):
+    """Writes the events with one bulk insert per database."""
+    by_db = {}
+    for event in events:
+        by_db.setdefault(db_for_board(event.board_id), []).append(event)
+    for using, batch in by_db.items():
+        TaskEvent.objects.using(using).bulk_create(batch)
+    events.clear()
+
+
+def keep(events):
+    """
+    Hands events collected in a nested `buffered()` block to the enclosing
+    buffer, or writes them right away when there is none.
+    """
+    outer = _buffer.get()
+    if outer is None:
+        flush(list(events))
+    else:
+        outer.extend(events)
+
+
+def snapshot(task):
+    """The tracked fields of a task, for `changes()` after an update."""
+    return {field: getattr(task, field) for field in TASK_FIELDS}
+
+
+def changes(before, task):
+    """Maps every tracked field that changed to its [old, new] values."""
+    def plain(value):
+        return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+    return {
+        field: [plain(old), plain(getattr(task, field))]
+        for field, old in before.items()
+        if getattr(task, field) != old
+    }
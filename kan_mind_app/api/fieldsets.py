@@ -0,0 +1,70 @@
+"""
+Sparse fieldsets and opt-in expansion for read endpoints.
+
+``?fields=`` selects the keys of the response and ``?expand=`` the relations
+rendered as nested objects, both as comma separated dotted paths::
+
+    /api/boards/1/?fields=id,title,tasks.id,tasks.status&expand=tasks
+
+Without ``?fields=`` every field is returned, without ``?expand=`` every
+relation is expanded, so responses without the parameters keep their full
+shape. With ``?expand=`` present, relations that are not listed are rendered
+as ids (users) or lists of ids (members, tasks).
+
+Fields that are not selected are dropped before serialization, so their
+queries and annotations never run.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+def parse_paths(value):
+    """Turns ``'a,b.c,b.d'`` into ``{'a': {}, 'b': {'c': {}, 'd': {}}}``; None stays None."""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class Fieldset:
+    """
+    The selection of one serializer level. `fields` and `expand` are trees of
+    names as built by `parse_paths()`, None selects or expands everything.
+    """
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        """The selection of ``?fields=`` and ``?expand=``, None without either."""
+        fields = parse_paths(request.query_params.get('fields'))
+        expand = parse_paths(request.query_params.get('expand'))
+        if fields is None and expand is None:
+            return None
+        return cls(fields, expand)
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+    def nested(self, name):
+        """The selection of the nested serializer `name`; all fields when none are named."""
+        fields = (self.fields or {}).get(name) or None
+        expand = None if self.expand is None else self.expand.get(name, {})
+        return Fieldset(fields, expand)
+
+    def validate(self, available, expandable):
+        """Rejects unknown field names and relations that cannot be expanded."""
+        unknown = sorted(set(self.fields or ()) - set(available))
+        if unknown:
+            raise ValidationError({'fields': [f'Unknown field "{name}".' for name in unknown]})
+        unknown = sorted(set(self.expand or ()) - set(expandable))
+        if unknown:
+            raise ValidationError({'expand': [f'"{name}" cannot be expanded.' for name in unknown]})
@@ -1,19 +1,47 @@
+from operator import attrgetter
 from rest_framework.permissions import BasePermission, IsAuthenticated, SAFE_METHODS
 from ..models import Board, Task
 from django.shortcuts import get_object_or_404
 from rest_framework.exceptions import NotFound, PermissionDenied
 
+
+def get_board(obj, board_path):
+    return attrgetter(board_path)(obj) if board_path else obj
+
+
+def has_board_access(user, obj, board_path=None):
+    """
+    Returns whether the user owns or is a member of the board of obj.
+    Uses the `has_board_access` annotation of scoped querysets when present.
+    """
+    if hasattr(obj, 'has_board_access'):
+        return obj.has_board_access
+    board = get_board(obj, board_path)
+    members = Board.members.through.objects.using(board._state.db)
+    return user.pk == board.user_id or members.filter(board_id=board.pk, user_id=user.pk).exists()
+
+
+def is_board_owner(user, obj, board_path=None):
+    """
+    Returns whether the user owns the board of obj.
+    Uses the `is_board_owner` annotation of scoped querysets when present.
+    """
+    if hasattr(obj, 'is_board_owner'):
+        return obj.is_board_owner
+    return user.pk == get_board(obj, board_path).user_id
+
+
 class IsBoardMemberOrOwner(BasePermission): 
     """
     Permission handles board-membership or ownership of the board
     """    
     def has_object_permission(self, request, view, obj):             
         if request.method in SAFE_METHODS: 
-            return bool(request.user in obj.members.all() or request.user == obj.user)
+            return bool(has_board_access(request.user, obj))
         elif request.method in ['PATCH', 'PUT']:
-            return bool(request.user in obj.members.all() or request.user == obj.user)
+            return bool(has_board_access(request.user, obj))
         else:
-            return bool(request.user and request.user == obj.user)
+            return bool(request.user and is_board_owner(request.user, obj))
         
 
 class IsBoardMemberOrOwnerForComments(BasePermission):
@@ -24,30 +52,20 @@ class IsBoardMemberOrOwnerForComments(BasePermission):
         if request.method in SAFE_METHODS:
             return request.user and request.user.is_authenticated
 
-        if request.method == 'POST':
-            task_id = view.kwargs.get('pk') 
-            if not task_id:
+        if request.method == 'POST' and hasattr(view, 'get_task'):
+            if not view.kwargs.get('pk'):
                 return False
-            
-            try:
-                task = Task.objects.select_related('board').get(id=task_id)
-                board = task.board
-            except Task.DoesNotExist:
-                raise NotFound('Task not found')
-
-            return (
-                request.user == board.user
-                or request.user in board.members.all()
-            )
+            # get_task() raises NotFound/PermissionDenied and caches the task for the view.
+            view.get_task()
+            return True
 
         return True
     
     def has_object_permission(self, request, view, obj):
-        board = obj.task.board
         if request.method in SAFE_METHODS:
-            return bool(request.user == board.user or request.user in board.members.all())
+            return bool(has_board_access(request.user, obj, 'task.board'))
         if request.method == 'DELETE': 
-            return bool(request.user == obj.author)
+            return bool(request.user.pk == obj.author_id)
         
         return False
 
@@ -56,16 +74,15 @@ class IsBoardMemberForTask(BasePermission):
     Permission handles board-membership or ownership of the board when handling tasks
     """
     def has_object_permission(self, request, view, obj):
-        board = obj.board
         user = request.user
 
         if request.method in SAFE_METHODS:
-            return user == board.user or user in board.members.all()
+            return has_board_access(user, obj, 'board')
 
         elif request.method in ['PUT', 'PATCH']:
-            return user == board.user or user in board.members.all()
+            return has_board_access(user, obj, 'board')
 
         elif request.method == 'DELETE':
-            return user == board.user or user == obj.creator
+            return is_board_owner(user, obj, 'board') or user.pk == obj.creator_id
 
-        return False
\ No newline at end of file
+        return False
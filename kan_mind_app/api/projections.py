@@ -0,0 +1,88 @@
+"""
+Read-only projections for large task listings.
+
+Build the response dicts straight from `values()` rows instead of model
+instances and DRF field machinery. The output matches `TaskSerializer`
+key for key, so the rendered JSON is byte-identical.
+
+Users are read with a separate query instead of a join, because they may
+live in another database than the tasks (see `kan_mind_app.sharding`).
+"""
+from kan_mind_app.models import User
+
+TASK_VALUES = (
+    'id', 'board_id', 'title', 'description', 'status', 'priority',
+    'assignee_id', 'reviewer_id', 'due_date', 'comment_count',
+)
+MEMBER_VALUES = ('id', 'email', 'username')
+# Keys of `project_task()` and the columns they are read from.
+TASK_COLUMNS = {
+    'id': 'id', 'board': 'board_id', 'title': 'title', 'description': 'description',
+    'status': 'status', 'priority': 'priority', 'assignee': 'assignee_id',
+    'reviewer': 'reviewer_id', 'due_date': 'due_date', 'comments_count': 'comment_count',
+}
+USER_KEYS = ('assignee', 'reviewer')
+
+
+def project_member(row):
+    """Same shape as `MemberSerializer`."""
+    return {
+        'id': row['id'],
+        'email': row['email'],
+        'fullname': row['username'],
+    }
+
+
+def project_members(user_ids):
+    """Projects the given users with one query, keyed by id."""
+    user_ids = set(user_ids) - {None}
+    if not user_ids:
+        return {}
+    return {row['id']: project_member(row) for row in User.objects.filter(pk__in=user_ids).values(*MEMBER_VALUES)}
+
+
+def project_task(row, members):
+    """Same shape and key order as `TaskSerializer` for reads."""
+    return {
+        'id': row['id'],
+        'board': row['board_id'],
+        'title': row['title'],
+        'description': row['description'],
+        'status': row['status'],
+        'priority': row['priority'],
+        'assignee': members.get(row['assignee_id']),
+        'reviewer': members.get(row['reviewer_id']),
+        'due_date': row['due_date'].isoformat(),
+        'comments_count': row['comment_count'],
+    }
+
+
+def project_tasks(queryset, fieldset=None):
+    """
+    Projects a Task queryset without instantiating models, with one query for
+    the tasks and one for their assignees and reviewers.
+    With a `Fieldset` only the selected fields are projected.
+    """
+    if fieldset is not None:
+        return project_selected_tasks(queryset, fieldset)
+    rows = list(queryset.values(*TASK_VALUES))
+    members = project_members(user_id for row in rows for user_id in (row['assignee_id'], row['reviewer_id']))
+    return [project_task(row, members) for row in rows]
+
+
+def project_selected_tasks(queryset, fieldset):
+    """
+    Like `project_tasks()`, but reads only the columns of the fields selected
+    by `fieldset`, plus `id`. Users are loaded only for expanded assignees
+    and reviewers; the others are rendered as ids.
+    """
+    keys = ['id', *(key for key in TASK_COLUMNS if key != 'id' and fieldset.includes(key))]
+    expanded = [key for key in USER_KEYS if key in keys and fieldset.expands(key)]
+    tasks = [dict(zip(keys, row)) for row in queryset.values_list(*(TASK_COLUMNS[key] for key in keys))]
+    members = project_members(task[key] for task in tasks for key in expanded)
+    for task in tasks:
+        for key in expanded:
+            task[key] = members.get(task[key])
+        if 'due_date' in task:
+            task['due_date'] = task['due_date'].isoformat()
+    return tasks
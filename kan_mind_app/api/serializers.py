@@ -1,8 +1,21 @@
+import copy
+
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers, status
-from kan_mind_app.models import Board, User, Task, Comment
+from kan_mind_app.models import DONE_STATUS, Board, User, Task, Comment, TaskEvent
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
+from rest_framework.utils import html
+from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from kan_mind_app.batch import ITEM_HEADERS
+from kan_mind_app.columns import first_pages
+from kan_mind_app.ranking import rank_at_end
+from kan_mind_app.sharding import add_to_directory, atomic, remove_from_directory
+from kan_mind_app.versioning import expected_versions, update_versioned
 
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -23,6 +36,159 @@ class MemberSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'fullname']
 
 
+class UserMap:
+    """
+    Request-scoped identity map of users.
+
+    Loads every referenced user at most once per request and memoizes its
+    `MemberSerializer` dict, so users that appear many times in a response
+    (members, assignees, reviewers, comment authors) cost one query in total
+    and are serialized once.
+    """
+    def __init__(self):
+        self.users = {}
+        self.members = {}
+
+    @classmethod
+    def for_context(cls, context):
+        """The map of the current request, or of the serializer context without one."""
+        request = context.get('request')
+        holder = getattr(request, '_request', request)
+        if holder is None:
+            return context.setdefault('user_map', cls())
+        if not hasattr(holder, 'kanmind_user_map'):
+            holder.kanmind_user_map = cls()
+        return holder.kanmind_user_map
+
+    def add(self, users):
+        for user in users:
+            self.users.setdefault(user.pk, user)
+
+    def load(self, user_ids):
+        """Fetches all users that are not in the map yet with one query."""
+        missing = {pk for pk in user_ids if pk is not None and pk not in self.users}
+        if missing:
+            self.users.update(User.objects.only('id', 'email', 'username').in_bulk(missing))
+
+    def get(self, user_id):
+        self.load([user_id])
+        return self.users.get(user_id)
+
+    def member(self, user_id):
+        if user_id not in self.members:
+            user = self.get(user_id)
+            self.members[user_id] = dict(MemberSerializer(user).data) if user else None
+        return self.members[user_id]
+
+
+def take_user_id(users, instance, source):
+    """
+    Returns the raw id of the user foreign key `source`. A user already
+    fetched with `select_related` is added to the map instead of refetched.
+    """
+    field = instance._meta.get_field(source)
+    if field.is_cached(instance):
+        related = getattr(instance, source)
+        if related is not None:
+            users.add([related])
+    return getattr(instance, field.attname)
+
+
+class UserMapField(serializers.Field):
+    """
+    Read-only field for a user foreign key, rendered through the `UserMap`.
+    Reads the raw `<source>_id` so no user is fetched per object.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return take_user_id(self.user_map(), instance, self.source)
+
+    def user_map(self):
+        return UserMap.for_context(self.context)
+
+
+class MemberField(UserMapField):
+    """A user in the shape of `MemberSerializer`, memoized per request."""
+    def to_representation(self, value):
+        return self.user_map().member(value)
+
+
+class UsernameField(UserMapField):
+    """A user as its username, like `StringRelatedField`."""
+    def to_representation(self, value):
+        user = self.user_map().get(value)
+        return str(user) if user else None
+
+
+class MemberListField(serializers.Field):
+    """The members of a board, each in the shape of `MemberSerializer`."""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        users = UserMap.for_context(self.context)
+        user_ids = list(member_ids(value.instance))
+        users.load(user_ids)
+        return [users.member(user_id) for user_id in user_ids]
+
+
+class UserMapListSerializer(serializers.ListSerializer):
+    """
+    Loads the users of all `UserMapField`s of the listed objects with one query
+    before the objects are rendered. Users already fetched with `select_related`
+    are taken over without a query.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        users = UserMap.for_context(self.context)
+        sources = [field.source for field in self.child.fields.values() if isinstance(field, UserMapField)]
+        users.load([take_user_id(users, item, source) for item in items for source in sources])
+        return super().to_representation(items)
+
+
+class FieldsetMixin:
+    """
+    Applies the `Fieldset` of ``?fields=`` and ``?expand=`` (see `fieldsets.py`).
+
+    Fields that are not selected are removed before serialization, relations
+    that are not expanded are replaced by their entry in `collapsed_fields`.
+    The root serializer takes the fieldset from the context and hands the
+    nested selections down to nested serializers.
+    """
+    collapsed_fields = {}
+
+    def get_fieldset(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            return self.context.get('fieldset')
+        return getattr(self, 'fieldset', None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+
+        readable = [name for name, field in fields.items() if not field.write_only]
+        fieldset.validate(readable, [name for name in self.collapsed_fields if name in readable])
+        for name in readable:
+            if not fieldset.includes(name):
+                del fields[name]
+            elif name in self.collapsed_fields and not fieldset.expands(name):
+                fields[name] = copy.deepcopy(self.collapsed_fields[name])
+            else:
+                nested = getattr(fields[name], 'child', fields[name])
+                if isinstance(nested, FieldsetMixin):
+                    nested.fieldset = fieldset.nested(name)
+        return fields
+
+
 class SafePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
     """
     A PrimaryKeyRelatedField that converts non-existent related object references
@@ -40,7 +206,104 @@ class SafePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
             raise exc
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class UserPrimaryKeyListField(serializers.Field):
+    """
+    A list of user primary keys, like `PrimaryKeyRelatedField(many=True)`,
+    but resolved with a single `pk__in` query instead of one query per id.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of items but got type "{input_type}".',
+        'incorrect_type': 'Incorrect type. Expected pk value, received {data_type}.',
+        'does_not_exist': 'Invalid pk "{pk_value}" - object does not exist.',
+    }
+
+    def get_value(self, dictionary):
+        if html.is_html_input(dictionary):
+            if self.field_name not in dictionary:
+                return serializers.empty
+            return dictionary.getlist(self.field_name)
+        return super().get_value(dictionary)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        ids = []
+        for item in data:
+            if isinstance(item, bool):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                ids.append(int(item))
+            except (TypeError, ValueError):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+
+        users = User.objects.in_bulk(ids)
+        for pk in ids:
+            if pk not in users:
+                self.fail('does_not_exist', pk_value=pk)
+        return [users[pk] for pk in dict.fromkeys(ids)]
+
+    def to_representation(self, value):
+        return list(member_ids(value.instance))
+
+
+class UserIdField(serializers.IntegerField):
+    """
+    A write-only user reference kept as a raw id during field validation.
+    The serializer resolves all of them together with `resolve_board_users()`.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('min_value', 1)
+        super().__init__(**kwargs)
+
+
+def member_ids(board):
+    """
+    Ids of the members of a board, read from the membership table alone.
+    Users may live in another database than the board, so they are not joined.
+    """
+    return (
+        Board.members.through.objects.using(board._state.db)
+        .filter(board_id=board.pk)
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+    )
+
+
+def resolve_board_users(board_id, user_ids):
+    """
+    Loads the given users with one `pk__in` query. Each user gets
+    `is_board_member`, true for the owner and the members of the board,
+    which are read with a second query on the board's database.
+    """
+    users = User.objects.in_bulk(user_ids)
+    board_user_ids = set()
+    for owner_id, member_id in Board.objects.filter(pk=board_id).values_list('user_id', 'members'):
+        board_user_ids.update((owner_id, member_id))
+    for user in users.values():
+        user.is_board_member = user.pk in board_user_ids
+    return users
+
+
+def set_board_members(board, users):
+    """
+    Makes `users` the members of the board by deleting and inserting only the
+    difference to the current members. Returns the added and removed user ids.
+    """
+    through = Board.members.through
+    current = set(through.objects.filter(board_id=board.pk).values_list('user_id', flat=True))
+    wanted = {user.pk for user in users}
+    added, removed = wanted - current, current - wanted
+    if removed:
+        through.objects.filter(board_id=board.pk, user_id__in=removed).delete()
+        remove_from_directory(board.pk, removed - {board.user_id})
+    if added:
+        through.objects.bulk_create([through(board_id=board.pk, user_id=user_id) for user_id in added])
+        add_to_directory(board.pk, added)
+    getattr(board, '_prefetched_objects_cache', {}).pop('members', None)
+    return added, removed
+
+
+class TaskSerializer(FieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Task objects.
     Handles validation and serialization of Task data.
@@ -54,52 +317,57 @@ class TaskSerializer(serializers.ModelSerializer):
         priority (str): Priority of the task (e.g., 'low', 'medium', 'high').
         assignee_id (int): ID of the user assigned to the task.
         reviewer_id (int): ID of the user reviewing the task.
-        assignee (str): Read-only. Name or representation of the assigned user.
-        reviewer (str): Read-only. Name or representation of the reviewer user.
+        assignee (str): Read-only. Name or representation of the assigned user, its id when not expanded.
+        reviewer (str): Read-only. Name or representation of the reviewer user, its id when not expanded.
         due_date (datetime): Deadline for the task completion.
         comments_count (int): Read-only. Number of comments attached to this task.
     """
-    assignee = MemberSerializer(read_only=True, required=False, allow_null=True)
-    reviewer = MemberSerializer(read_only=True, required=False, allow_null=True)
+    assignee = MemberField()
+    reviewer = MemberField()
     board = SafePrimaryKeyRelatedField(queryset=Board.objects.all())
-    assignee_id = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
+    assignee_id = UserIdField(
         source='assignee',
         write_only=True,
         required=False,
         allow_null=True
     )
-    reviewer_id = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
+    reviewer_id = UserIdField(
         source='reviewer',
         write_only=True,
         required=False,
         allow_null=True
     )
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
+
+    collapsed_fields = {
+        'assignee': serializers.IntegerField(source='assignee_id', read_only=True),
+        'reviewer': serializers.IntegerField(source='reviewer_id', read_only=True),
+    }
 
-    def get_comments_count(self, obj): 
-        return obj.comments.count()
     class Meta: 
         model = Task
         fields = ['id', 'board', 'title', 'description', 'status', 'priority','assignee_id','reviewer_id', 'assignee', 'reviewer', 'due_date', 'comments_count']
+        list_serializer_class = UserMapListSerializer
 
     def validate(self, attrs):     
-        user = self.context['request'].user
-
-        board = attrs.get('board') or getattr(self.instance, 'board', None)
-        
-        assignee = attrs.get('assignee')
-        if assignee and assignee != board.user and assignee not in board.members.all():
-            res = serializers.ValidationError({'detail': 'Assignee must be a member of the board.'})
-            res.status_code = 401
-            raise res
-        
-        reviewer = attrs.get('reviewer')
-        if reviewer and reviewer != board.user and reviewer not in board.members.all():
-            res = serializers.ValidationError({'detail': 'Reviewer must be a member of the board.'})
-            res.status_code = 401
-            raise res
+        board = attrs.get('board')
+        board_id = board.pk if board else getattr(self.instance, 'board_id', None)
+
+        user_ids = {attrs[field] for field in ('assignee', 'reviewer') if attrs.get(field)}
+        users = resolve_board_users(board_id, user_ids) if user_ids else {}
+
+        for field, label in (('assignee', 'Assignee'), ('reviewer', 'Reviewer')):
+            user_id = attrs.get(field)
+            if not user_id:
+                continue
+            user = users.get(user_id)
+            if user is None:
+                raise serializers.ValidationError({f'{field}_id': [f'Invalid pk "{user_id}" - object does not exist.']})
+            if not user.is_board_member:
+                res = serializers.ValidationError({'detail': f'{label} must be a member of the board.'})
+                res.status_code = 401
+                raise res
+            attrs[field] = user
 
         return attrs
     
@@ -121,12 +389,13 @@ class TaskDetailSerializer(TaskSerializer):
         reviewer (str): Read-only. Name or representation of the reviewer user.
         due_date (datetime): Deadline for the task completion.
     """
-    assignee = MemberSerializer(read_only=True, required=False, allow_null=True)
-    reviewer = MemberSerializer(read_only=True, required=False, allow_null=True)
+    assignee = MemberField()
+    reviewer = MemberField()
 
     class Meta: 
         model = Task
         fields = ['id','title', 'description', 'status', 'priority','assignee_id', 'reviewer_id','assignee', 'reviewer','due_date']
+        list_serializer_class = UserMapListSerializer
 
     def update(self, instance, validated_data):   
         allowed_fields = {'title', 'description', 'status', 'priority','assignee_id', 'reviewer_id', 'due_date'}
@@ -134,7 +403,15 @@ class TaskDetailSerializer(TaskSerializer):
             if field not in allowed_fields:
                 validated_data.pop(field)
 
-        return super().update(instance, validated_data)
+        changes = dict(validated_data)
+        if 'status' in changes:
+            if changes['status'] == DONE_STATUS:
+                changes['done_at'] = Coalesce('done_at', Value(timezone.now()))
+            else:
+                changes['done_at'] = None
+            if changes['status'] != instance.status:
+                changes['position'] = rank_at_end(instance.board_id, changes['status'])
+        return update_versioned(instance, changes, expected_versions(self.context.get('request')))
     
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -148,11 +425,12 @@ class CommentSerializer(serializers.ModelSerializer):
         author (str): Read-only. Username of the comment's author.
         content (str): Required. Text content of the comment.
     """
-    author = serializers.StringRelatedField(read_only=True)
+    author = UsernameField()
     created_at = serializers.DateTimeField(read_only=True)
     class Meta:
         model = Comment
         fields = ['id','created_at', 'author' ,'content']
+        list_serializer_class = UserMapListSerializer
 
     def validate_content(self, value):
         if not value or not value.strip():
@@ -162,7 +440,27 @@ class CommentSerializer(serializers.ModelSerializer):
         return value
 
 
-class BoardSerializer(serializers.ModelSerializer):
+class TaskEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for TaskEvent objects of the board activity feed.
+
+    Fields:
+        id (int): Read-only. Unique identifier of the event, used as pagination cursor.
+        task_id (int): Task the event refers to, if any.
+        actor (str): Read-only. Username of the user who made the change.
+        verb (str): Kind of change (e.g. 'task_updated', 'comment_created').
+        data (dict): Details of the change, e.g. changed fields with old and new values.
+        created_at (datetime): Timestamp of the change.
+    """
+    actor = UsernameField()
+
+    class Meta:
+        model = TaskEvent
+        fields = ['id', 'task_id', 'actor', 'verb', 'data', 'created_at']
+        list_serializer_class = UserMapListSerializer
+
+
+class BoardSerializer(FieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Board objects.
     Handles validation and serialization of Board data.
@@ -176,12 +474,9 @@ class BoardSerializer(serializers.ModelSerializer):
         tasks_to_do_count (int): Read-only. Number of tasks with status 'to-do' in this board.
         tasks_high_prio_count (int): Read-only. Number of tasks with high priority in this board.
         owner_id (int): Read-only. Primary key of the board owner.
+        is_template (bool): Read-only. Whether the board is a template for new boards.
     """
-    members = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
-        many = True,
-        write_only = True,
-    )
+    members = UserPrimaryKeyListField(write_only=True)
 
     member_count = serializers.SerializerMethodField()
     owner_id = serializers.PrimaryKeyRelatedField(
@@ -194,10 +489,17 @@ class BoardSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Board
-        fields = ['id', 'title', 'members', 'member_count', "ticket_count", "tasks_to_do_count", "tasks_high_prio_count", 'owner_id']
+        fields = ['id', 'title', 'members', 'member_count', "ticket_count", "tasks_to_do_count", "tasks_high_prio_count", 'owner_id', 'is_template']
+
+    def create(self, validated_data):
+        members = validated_data.pop('members', [])
+        board = super().create(validated_data)
+        add_to_directory(board.pk, [board.user_id])
+        set_board_members(board, members)
+        return board
 
     def get_member_count(self, obj):      
-        return obj.members.count()
+        return member_ids(obj).count()
     
     def get_ticket_count(self, obj):
         return obj.tasks.count()
@@ -209,6 +511,12 @@ class BoardSerializer(serializers.ModelSerializer):
         return obj.tasks.filter(priority__iexact='high').count()
 
 
+class ColumnTaskListSerializer(UserMapListSerializer):
+    """The first tasks of every status column of a board, see `BoardDetailSerializer.load_columns()`."""
+    def get_attribute(self, instance):
+        return self.parent.load_columns(instance)[0]
+
+
 class BoardDetailSerializer(BoardSerializer):
     """
     Serializer for Board objects.
@@ -219,18 +527,38 @@ class BoardDetailSerializer(BoardSerializer):
         title (str): Title of the board.
         members (list of int): Primary keys of users who are members of the board.
         owner_id (int): Read-only. Primary key of the board owner.
-        tasks: list of all task objects assigned to this board
+        tasks: list of the first task objects of every status column, their ids when not expanded
+        columns (list): Read-only. Per status column its `status`, `total` number of tasks and the
+            `next_cursor` for loading the rest from /api/boards/<id>/columns/<status>/.
     """   
-    members = MemberSerializer(many=True, read_only=True)
-    tasks = TaskSerializer(many=True, read_only=True)
+    members = MemberListField()
+    tasks = ColumnTaskListSerializer(child=TaskSerializer(), read_only=True)
+    columns = serializers.SerializerMethodField()
     owner_id = serializers.PrimaryKeyRelatedField(
         source='user',  
         read_only=True
     )
 
+    collapsed_fields = {
+        'members': UserPrimaryKeyListField(read_only=True),
+        'tasks': serializers.SerializerMethodField(method_name='get_task_ids'),
+    }
+
     class Meta:
         model = Board
-        fields = ['id', 'title', 'owner_id', 'members', 'tasks']
+        fields = ['id', 'title', 'owner_id', 'members', 'tasks', 'columns']
+
+    def load_columns(self, board):
+        """The first pages of the columns, loaded once per board; the page size comes from the context."""
+        if not hasattr(board, 'column_pages'):
+            board.column_pages = first_pages(board.pk, self.context.get('column_limit', 50))
+        return board.column_pages
+
+    def get_columns(self, obj):
+        return self.load_columns(obj)[1]
+
+    def get_task_ids(self, obj):
+        return [task.pk for task in self.load_columns(obj)[0]]
 
 
 class BoardUpdateSerializer(serializers.ModelSerializer):
@@ -245,8 +573,9 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
         owner_data: Data of Owner object .
         members_data: list of all members part of the board
     """
-    owner_data = MemberSerializer(source='user', read_only=True)
-    members_data = MemberSerializer(source='members', many=True, read_only=True)
+    members = UserPrimaryKeyListField(required=False)
+    owner_data = MemberField(source='user')
+    members_data = MemberListField(source='members')
 
     class Meta:
         model = Board
@@ -265,4 +594,73 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
             if field not in allowed_fields:
                 validated_data.pop(field)
 
-        return super().update(instance, validated_data)
\ No newline at end of file
+        members = validated_data.pop('members', None)
+        with atomic():
+            update_versioned(instance, validated_data, expected_versions(self.context.get('request')))
+            self.membership_changes = set(), set()
+            if members is not None:
+                self.membership_changes = set_board_members(instance, members)
+        return instance
+
+class BoardCloneSerializer(serializers.Serializer):
+    """
+    Serializer for the options of copying a board.
+
+    Fields:
+        title (str): Optional. Title of the copy, defaults to the title of the source board.
+        include_tasks (bool): Whether the tasks are copied. Defaults to true.
+        include_members (bool): Whether the members are copied. Defaults to false.
+        include_comments (bool): Whether the comments of the tasks are copied. Defaults to false.
+        as_template (bool): Whether the copy is saved as a template. Defaults to false.
+    """
+    title = serializers.CharField(max_length=100, required=False)
+    include_tasks = serializers.BooleanField(default=True)
+    include_members = serializers.BooleanField(default=False)
+    include_comments = serializers.BooleanField(default=False)
+    as_template = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['include_comments'] and not data['include_tasks']:
+            raise serializers.ValidationError({'include_comments': ['Comments can only be copied together with the tasks.']})
+        return data
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """
+    Serializer for one sub-request of a batch.
+
+    Fields:
+        method (str): HTTP method of the sub-request.
+        path (str): Path of an API route, optionally with a query string (e.g. '/api/tasks/1/comments/?limit=20').
+        body (dict or list): Optional. JSON body of the sub-request.
+        headers (dict): Optional. Headers of the sub-request, only 'If-Match' is supported.
+    """
+    method = serializers.ChoiceField(choices=['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.RegexField(r'^/api/', max_length=2000)
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(max_length=255), required=False)
+
+    def validate_headers(self, value):
+        unsupported = sorted(set(value) - set(ITEM_HEADERS))
+        if unsupported:
+            raise serializers.ValidationError(f'Unsupported headers: {", ".join(unsupported)}.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Serializer for a batch of API requests.
+
+    Fields:
+        requests (list): The sub-requests, run in order.
+        atomic (bool): Whether all sub-requests run in one transaction that is rolled back
+            when one of them fails. Defaults to false.
+    """
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = settings.KANMIND_BATCH['MAX_REQUESTS']
+        if len(value) > limit:
+            raise serializers.ValidationError(f'A batch must not contain more than {limit} requests.')
+        return value
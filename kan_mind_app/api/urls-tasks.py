@@ -1,12 +1,15 @@
 from django.urls import path
-from .views import ReviewedTasksList, AssignedTasksList, TasksList, TasksDetail, CommentsList, CommentsDetail
+from .views import ReviewedTasksList, AssignedTasksList, TasksList, TasksDetail, CommentsList, CommentsDetail, ArchivedTaskRestore, TaskMove, TaskCalendar
 
 urlpatterns = [
     path('', TasksList.as_view(), name='tasks-list'),
     path('<int:pk>/', TasksDetail.as_view(), name='tasks-detail'),
+    path('<int:pk>/move/', TaskMove.as_view(), name='tasks-move'),
     path('<int:pk>/comments/', CommentsList.as_view(), name='comments-list'),
     path('<int:pk>/comments/<int:comment_id>/', CommentsDetail.as_view(), name='comments-detail'),
     path('assigned-to-me/', AssignedTasksList.as_view(), name='tasks-assigned'),
-    path('reviewing/', ReviewedTasksList.as_view(), name='tasks-review')
+    path('reviewing/', ReviewedTasksList.as_view(), name='tasks-review'),
+    path('calendar/', TaskCalendar.as_view(), name='tasks-calendar'),
+    path('archived/<int:pk>/restore/', ArchivedTaskRestore.as_view(), name='tasks-archived-restore'),
     
 ]
\ No newline at end of file
@@ -1,8 +1,12 @@
 from django.urls import path
-from .views import BoardsList, BoardDetail
+from .views import BoardsList, BoardDetail, BoardActivityList, BoardClone, BoardColumn, BoardMarkRead
 
 urlpatterns = [
     path('', BoardsList.as_view(), name='board-list'),
     path('<int:pk>/', BoardDetail.as_view(), name='board-detail'),
+    path('<int:pk>/columns/<str:status_name>/', BoardColumn.as_view(), name='board-column'),
+    path('<int:pk>/activity/', BoardActivityList.as_view(), name='board-activity'),
+    path('<int:pk>/clone/', BoardClone.as_view(), name='board-clone'),
+    path('<int:pk>/read/', BoardMarkRead.as_view(), name='board-read'),
     
 ]
\ No newline at end of file
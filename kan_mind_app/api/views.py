@@ -1,149 +1,575 @@
+import datetime
+from collections import Counter
+
+from django.conf import settings
 from django.http import Http404
 from rest_framework import generics, status
-from kan_mind_app.models import Board, Task, Comment
-from .serializers import BoardSerializer, TaskSerializer, CommentSerializer, TaskDetailSerializer,BoardUpdateSerializer, BoardDetailSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from kan_mind_app import activity
+from kan_mind_app.archive import restore_task
+from kan_mind_app.batch import run_batch
+from kan_mind_app.cloning import clone_board
+from kan_mind_app.columns import column_page
+from kan_mind_app.deletion import schedule_board_deletion
+from kan_mind_app.member_search import cached_search_users
+from kan_mind_app import idempotency
+from kan_mind_app.models import DONE_STATUS, ArchivedTask, Board, Task, Comment, TaskEvent
+from kan_mind_app.ranking import needs_rebalance, rank_at_end, rank_between, schedule_rebalance
+from kan_mind_app.sharding import allocate_board_id, atomic, fan_out, use_shard_of
+from kan_mind_app.summary import get_summary, invalidate_summaries
+from kan_mind_app.unread import add_unread_counts, mark_board_read, mark_read
+from kan_mind_app.versioning import etag, expected_versions, update_versioned
+from .serializers import BoardSerializer, TaskSerializer, CommentSerializer, TaskDetailSerializer,BoardUpdateSerializer, BoardDetailSerializer, TaskEventSerializer, BoardCloneSerializer, BatchSerializer
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly, IsAuthenticated
 from .permissions import IsBoardMemberOrOwner, IsBoardMemberOrOwnerForComments , IsBoardMemberForTask    
-from django.db.models import Q
+from django.db.models import F, Q
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from .fieldsets import Fieldset
+from .projections import TASK_COLUMNS, USER_KEYS, project_tasks
+
+
+def get_limit(request, default, maximum):
+    """Reads ``?limit=`` as a page size between 1 and `maximum`."""
+    limit = get_query_int(request, 'limit')
+    if limit is None:
+        return default
+    if limit < 1:
+        raise ValidationError({'detail': 'limit must be at least 1.'})
+    return min(limit, maximum)
+
+
+def get_query_int(request, name):
+    """Reads a non-negative integer query parameter, None when it is missing."""
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValidationError({'detail': f'{name} must be an integer.'})
+    if value < 0:
+        raise ValidationError({'detail': f'{name} must not be negative.'})
+    return value
+
+
+class TaskProjectionListMixin:
+    """
+    Serves list reads through the `values()` projection of `projections.py`
+    instead of `TaskSerializer`. The JSON output is identical.
+
+    Every task gets the number of `unread_comments` of the user, counted for
+    all tasks in one grouped query.
+
+    With ``?include_archived=1`` the archived tasks of `get_archived_queryset()`
+    are appended and every task gets an `archived` flag.
+
+    ``?fields=`` and ``?expand=`` select the keys and the expanded users of the
+    tasks (see `fieldsets.py`); unread counts are only queried when selected.
+
+    With split board data the querysets run once per shard of the user's boards.
+    """
+    def list(self, request, *args, **kwargs):
+        include_archived = request.query_params.get('include_archived') in ('1', 'true')
+        fieldset = Fieldset.from_request(request)
+        extra_keys = ('unread_comments', 'archived') if include_archived else ('unread_comments',)
+        if fieldset is not None:
+            fieldset.validate([*TASK_COLUMNS, *extra_keys], USER_KEYS)
+        with_unread = fieldset is None or fieldset.includes('unread_comments')
+
+        def list_shard():
+            queryset = self.filter_queryset(self.get_queryset())
+            tasks = project_tasks(queryset, fieldset)
+            if with_unread:
+                add_unread_counts(request.user, tasks, queryset)
+            archived = project_tasks(self.get_archived_queryset(), fieldset) if include_archived else []
+            if with_unread:
+                archived = [dict(task, unread_comments=0) for task in archived]
+            return tasks, archived
+
+        shards = fan_out(request.user, list_shard)
+        tasks = [task for shard_tasks, _ in shards for task in shard_tasks]
+        if include_archived:
+            tasks = [dict(task, archived=False) for task in tasks] + [
+                dict(task, archived=True) for _, archived in shards for task in archived
+            ]
+        if fieldset is not None:
+            tasks = [{key: value for key, value in task.items() if fieldset.includes(key)} for task in tasks]
+        return Response(tasks)
+
+
+class FieldsetViewMixin:
+    """
+    Hands the `Fieldset` of ``?fields=`` and ``?expand=`` to the serializers
+    of read requests.
+    """
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context['fieldset'] = Fieldset.from_request(self.request)
+        return context
 
 
-class BoardsList(generics.ListCreateAPIView):
+class VersionETagMixin:
+    """
+    Sends the `version` of the object of detail views as ``ETag`` with reads and
+    updates. Clients send it back in ``If-Match`` to make an update conditional,
+    see `kan_mind_app.versioning`.
+    """
+    def get_object(self):
+        self.versioned_object = super().get_object()
+        return self.versioned_object
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        instance = getattr(self, 'versioned_object', None)
+        if instance is not None and request.method != 'DELETE' and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag(instance.version)
+        return response
+
+
+class IdempotentCreateMixin:
+    """
+    Makes POSTs with an ``Idempotency-Key`` header safe to retry, see
+    `kan_mind_app.idempotency`. The key is claimed right after authentication;
+    a retry gets the stored response of the first request, marked with an
+    ``Idempotent-Replayed`` header, without permission checks or the view running again.
+    """
+    idempotency_record = None
+    idempotent_replay = None
+
+    def check_permissions(self, request):
+        key = request.headers.get('Idempotency-Key')
+        if request.method == 'POST' and key and request.user.is_authenticated:
+            if len(key) > idempotency.MAX_KEY_LENGTH:
+                raise ValidationError({'detail': f'Idempotency-Key must not be longer than {idempotency.MAX_KEY_LENGTH} characters.'})
+            record, owned = idempotency.claim(request.user, key, idempotency.fingerprint(request))
+            if not owned:
+                self.idempotent_replay = Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+                return
+            self.idempotency_record = record
+        super().check_permissions(request)
+
+    def post(self, request, *args, **kwargs):
+        if self.idempotent_replay is not None:
+            return self.idempotent_replay
+        return super().post(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            if self.idempotency_record is not None:
+                idempotency.release(self.idempotency_record)
+                self.idempotency_record = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.idempotency_record is not None:
+            idempotency.complete(self.idempotency_record, response.status_code, response.data)
+            self.idempotency_record = None
+        return response
+
+
+class BoardsList(FieldsetViewMixin, generics.ListCreateAPIView):
     """
     API endpoint for listing and creating boards.
 
     Lists all boards where the authenticated user is a member or owner,
     and allows creating a new board with the requesting user set as the owner.
+    Board templates are only listed with ``?templates=1``.
     """
     queryset = Board.objects.all()
     serializer_class = BoardSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):     
-        user = self.request.user
-        return Board.objects.filter(Q(user=user) | Q(members=user)).distinct()
+        boards = Board.objects.visible_to(self.request.user)
+        return boards.filter(is_template=bool(get_query_int(self.request, 'templates')))
+
+    def list(self, request, *args, **kwargs):
+        shards = fan_out(request.user, lambda: self.get_serializer(self.get_queryset(), many=True).data)
+        return Response([board for boards in shards for board in boards])
 
     def perform_create(self, serializer):
-        board = serializer.save(user=self.request.user)
+        board_id = allocate_board_id()
+        with use_shard_of(board_id):
+            board = serializer.save(user=self.request.user, id=board_id)
+            invalidate_summaries([board.pk])
+        activity.record(board.pk, 'board_created', self.request.user, title=board.title)
 
 
-class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
+class BoardDetail(VersionETagMixin, FieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for specific boards, to update or delete them.
 
     Lists the board of specific primary key where user is a member or owner,
     and allows updating or deleting a board.
+    Only the first ``?limit=`` tasks of every status column are returned, with the
+    total and a cursor per column for `BoardColumn`. Updates honour ``If-Match``.
     """
     queryset = Board.objects.all()
     serializer_class = BoardDetailSerializer
     permission_classes = [IsAuthenticated ,IsBoardMemberOrOwner]
+    default_column_limit = 50
+    max_column_limit = 200
+
+    def get_queryset(self):
+        return Board.objects.with_access(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context['column_limit'] = get_limit(self.request, self.default_column_limit, self.max_column_limit)
+        return context
 
     def get_serializer_class(self):     
         if self.request.method in ['PATCH', 'PUT']:
             return BoardUpdateSerializer
         return BoardDetailSerializer
 
-class TasksList(generics.ListCreateAPIView):
+    def perform_update(self, serializer):
+        board = serializer.instance
+        invalidate_summaries([board.pk])
+        serializer.save()
+        invalidate_summaries([board.pk])
+
+        added, removed = serializer.membership_changes
+        for user_id in sorted(added):
+            activity.record(board.pk, 'member_added', self.request.user, user_id=user_id)
+        for user_id in sorted(removed):
+            activity.record(board.pk, 'member_removed', self.request.user, user_id=user_id)
+
+    def perform_destroy(self, instance):
+        schedule_board_deletion(instance)
+
+
+class BoardColumn(APIView):
+    """
+    API endpoint for paging through one status column of a board.
+
+    Returns the next ``?limit=`` tasks of the column after ``?cursor=``, the
+    `next_cursor` of a column in the board detail or of the previous page, and
+    the cursor of the following page (None on the last one). Supports
+    ``?fields=`` and ``?expand=`` for the tasks like the task endpoints.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 50
+    max_limit = 200
+
+    def get(self, request, pk, status_name):
+        board = Board.objects.with_access(request.user).filter(pk=pk).first()
+        if board is None:
+            raise NotFound('Board not found.')
+        if not board.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        limit = get_limit(request, self.default_limit, self.max_limit)
+        try:
+            tasks, next_cursor = column_page(board.pk, status_name, limit, request.query_params.get('cursor'))
+        except ValueError:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        context = {'request': request, 'fieldset': Fieldset.from_request(request)}
+        return Response({
+            'status': status_name,
+            'tasks': TaskSerializer(tasks, many=True, context=context).data,
+            'next_cursor': next_cursor,
+        })
+
+
+class BoardClone(APIView):
+    """
+    API endpoint for copying a board.
+
+    Copies a board where the user is a member or owner into a new board owned by the user,
+    optionally with its tasks, members and comments. Copying a template creates a new
+    board from it, ``as_template`` saves the copy as a template.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        board = Board.objects.with_access(request.user).filter(pk=pk).first()
+        if board is None:
+            raise NotFound('Board not found.')
+        if not board.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        options = BoardCloneSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        clone = clone_board(board, request.user, **options.validated_data)
+        activity.record(clone.pk, 'board_created', request.user, title=clone.title, cloned_from=board.pk)
+        return Response(BoardSerializer(clone).data, status=status.HTTP_201_CREATED)
+
+
+class BoardMarkRead(APIView):
+    """
+    API endpoint for marking all comments of a board as read.
+
+    Moves the read markers of the user on every task of a board where the user
+    is a member or owner to the newest comment.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        board = Board.objects.with_access(request.user).filter(pk=pk).first()
+        if board is None:
+            raise NotFound('Board not found.')
+        if not board.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        mark_board_read(request.user, board.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BoardActivityList(generics.ListAPIView):
+    """
+    API endpoint for the activity feed of a board.
+
+    Lists the newest events of a board where the user is a member or owner.
+    Older events are loaded with ``?before_id=<id of the last event>&limit=``.
+    """
+    serializer_class = TaskEventSerializer
+    permission_classes = [IsAuthenticated]
+    default_limit = 50
+    max_limit = 200
+
+    def get_queryset(self):
+        board = Board.objects.with_access(self.request.user).filter(pk=self.kwargs['pk']).first()
+        if board is None:
+            raise NotFound('Board not found.')
+        if not board.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        before_id = get_query_int(self.request, 'before_id')
+        limit = get_limit(self.request, self.default_limit, self.max_limit)
+        events = TaskEvent.objects.filter(board_id=board.pk)
+        if before_id is not None:
+            events = events.filter(id__lt=before_id)
+        return events.order_by('-id')[:limit]
+
+
+class TasksList(IdempotentCreateMixin, TaskProjectionListMixin, generics.ListCreateAPIView):
     """
     API endpoint for listing and creating tasks.
 
     Lists all tasks of boards where the authenticated user is a member or owner,
     and allows creating a new task with the requesting user set as the creator.
+    Creation can be retried safely with an ``Idempotency-Key`` header.
     """
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated, IsBoardMemberForTask]
+    throttle_scope = 'tasks'
 
     def get_queryset(self):
-        user = self.request.user
-        return Task.objects.filter(
-            board__members=user
-        ) | Task.objects.filter(
-            board__user=user
-        )
+        return Task.objects.visible_to(self.request.user).exclude_templates()
+
+    def get_archived_queryset(self):
+        return ArchivedTask.objects.visible_to(self.request.user).exclude_templates()
+
+    def create(self, request, *args, **kwargs):
+        with use_shard_of(request.data.get('board')):
+            return super().create(request, *args, **kwargs)
     
     def perform_create(self, serializer):    
         board_id = self.request.data.get("board")
-        user = self.request.user
-        board = get_object_or_404(Board, pk=board_id)
-
-        try: 
-            board = Board.objects.get(id = board_id)
-            if not board:
-                raise NotFound('Board not found')
-        except Board.DoesNotExist:
+        board = Board.objects.with_access(self.request.user).filter(pk=board_id).first()
+        if board is None:
             raise NotFound('Board not found.')
-        
-        if user != board.user and user not in board.members.all():
+        if not board.has_board_access:
             raise PermissionDenied("You are not a member of the board.")
         
-        serializer.save(creator=self.request.user, board=board)
+        position = rank_at_end(board.pk, serializer.validated_data.get('status'))
+        task = serializer.save(creator=self.request.user, board=board, position=position)
+        invalidate_summaries([board.pk])
+        activity.record(board.pk, 'task_created', self.request.user, task.pk, title=task.title)
 
-class TasksDetail(generics.RetrieveUpdateDestroyAPIView):
+class TasksDetail(VersionETagMixin, FieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for specific tasks, to update or delete them.
 
     Lists the tasks of specific primary key of boards where user is a member or owner,
-    and allows updating or deleting a task.
+    and allows updating or deleting a task. Updates honour ``If-Match``.
     """
     queryset = Task.objects.all()
     serializer_class = TaskDetailSerializer
     permission_classes = [IsAuthenticated, IsBoardMemberForTask]
 
-class CommentsList(generics.ListCreateAPIView):
+    def get_queryset(self):
+        return Task.objects.with_access(self.request.user)
+
+    def perform_update(self, serializer):
+        before = activity.snapshot(serializer.instance)
+        task = serializer.save()
+        invalidate_summaries([task.board_id])
+        changes = activity.changes(before, task)
+        if changes:
+            activity.record(task.board_id, 'task_updated', self.request.user, task.pk, changes=changes)
+
+    def perform_destroy(self, instance):
+        board_id, task_id = instance.board_id, instance.pk
+        instance.delete()
+        invalidate_summaries([board_id])
+        activity.record(board_id, 'task_deleted', self.request.user, task_id, title=instance.title)
+
+class TaskMove(APIView):
+    """
+    API endpoint for moving a task within its board.
+
+    Places the task between the neighbours `after` (the task above) and `before`
+    (the task below), optionally in another `status` column. Only the moved task
+    is written; columns whose ranks grow too long are rebalanced in the background.
+    Honours ``If-Match`` like task updates.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        task = Task.objects.with_access(request.user).filter(pk=pk).first()
+        if task is None:
+            raise NotFound('Task not found.')
+        if not task.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        status_name = request.data.get('status') or task.status
+        neighbour_ids = {}
+        for name in ('after', 'before'):
+            value = request.data.get(name)
+            if value is None:
+                continue
+            try:
+                if isinstance(value, bool) or not isinstance(value, (int, str)):
+                    raise TypeError
+                neighbour_ids[name] = int(value)
+            except (TypeError, ValueError):
+                raise ValidationError({name: 'Must be the id of a task.'})
+            if neighbour_ids[name] < 1:
+                raise ValidationError({name: 'Must be the id of a task.'})
+        neighbours = dict(
+            Task.objects.filter(board_id=task.board_id, status=status_name, pk__in=neighbour_ids.values())
+            .exclude(pk=task.pk).values_list('pk', 'position')
+        ) if neighbour_ids else {}
+        positions = {}
+        for name, neighbour_id in neighbour_ids.items():
+            if neighbour_id not in neighbours:
+                raise ValidationError({name: 'Must be a task in the same board and column.'})
+            positions[name] = neighbours[neighbour_id]
+
+        if not positions:
+            position = rank_at_end(task.board_id, status_name)
+        else:
+            try:
+                position = rank_between(positions.get('after'), positions.get('before'))
+            except ValueError:
+                raise ValidationError({'detail': '"after" must be placed before "before".'})
+
+        previous_status = task.status
+        changes = {'position': position}
+        if status_name != task.status:
+            changes['status'] = status_name
+            changes['done_at'] = timezone.now() if status_name == DONE_STATUS else None
+        update_versioned(task, changes, expected_versions(request))
+
+        if needs_rebalance(position):
+            schedule_rebalance(task.board_id, status_name)
+        if 'status' in changes:
+            invalidate_summaries([task.board_id])
+            activity.record(task.board_id, 'task_updated', request.user, task.pk,
+                            changes={'status': [previous_status, status_name]})
+        return Response({'id': task.pk, 'status': status_name, 'position': position}, headers={'ETag': etag(task.version)})
+
+
+class ArchivedTaskRestore(APIView):
+    """
+    API endpoint for restoring an archived task.
+
+    Moves the archived task and its comments back to the active tasks of the board,
+    for users who are a member or owner of the board.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        archived_task = ArchivedTask.objects.with_access(request.user).filter(pk=pk).first()
+        if archived_task is None:
+            raise NotFound('Archived task not found.')
+        if not archived_task.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
+
+        task = restore_task(archived_task)
+        activity.record(task.board_id, 'task_restored', request.user, task.pk, title=task.title)
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
+
+
+class CommentsList(IdempotentCreateMixin, generics.ListCreateAPIView):
     """
     API endpoint for listing and creating comments.
 
     Lists all comments of tasks of boards where the authenticated user is a member or owner,
     and allows creating a new comment with the requesting user set as the author.
+
+    The thread can be loaded incrementally with ``?after_id=``, ``?before_id=``
+    and ``?limit=``. With only ``limit`` the newest comments are returned, always
+    in chronological order. Loading comments marks them as read for the user.
+    Creation can be retried safely with an ``Idempotency-Key`` header.
     """
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsBoardMemberOrOwnerForComments]
+    max_limit = 100
 
     def get_task(self):
-        task_id = self.kwargs.get("pk")
+        """
+        Returns the task of the url, fetched and access-checked in one query.
+        The result is cached on the view for the rest of the request.
+        """
+        if hasattr(self, '_task'):
+            return self._task
+
+        task = Task.objects.with_access(self.request.user).filter(pk=self.kwargs['pk']).first()
+        if task is None:
+            raise NotFound('Task not found.')
+        if not task.has_board_access:
+            raise PermissionDenied("You are not a member of the board.")
 
-        task = get_object_or_404(Task.objects.select_related('board'), pk=task_id)
+        self._task = task
         return task
 
-    def get_queryset(self):    
+    def get_queryset(self):
         task = self.get_task()
-        task_id = self.kwargs['pk']
-        user = self.request.user
-        try:
-            task = Task.objects.get(pk=task_id)
-        except Task.DoesNotExist:
-            raise NotFound("Task not found.")
-
-        board = task.board
-        if user != board.user and user not in board.members.all():
-            raise PermissionDenied("You are not a member of the board.")
-        return Comment.objects.filter(task=task).order_by("created_at")
+        after_id = get_query_int(self.request, 'after_id')
+        before_id = get_query_int(self.request, 'before_id')
+        limit = get_limit(self.request, None, self.max_limit)
+
+        comments = Comment.objects.filter(task_id=task.pk)
+        if after_id is not None:
+            comments = comments.filter(id__gt=after_id)
+        if before_id is not None:
+            comments = comments.filter(id__lt=before_id)
+
+        if limit is None:
+            return comments.order_by('id')
+        if after_id is not None:
+            return comments.order_by('id')[:limit]
+        return list(reversed(comments.order_by('-id')[:limit]))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.data:
+            mark_read(request.user, self.get_task().pk, max(comment['id'] for comment in response.data))
+        return response
 
-    def perform_create(self, serializer):     
+    def perform_create(self, serializer):
         task = self.get_task()
-        task_id = self.kwargs['pk']
-        user = self.request.user 
         content = self.request.data.get("content", "").strip()
-
         if not content:
             raise ValidationError({'detail': 'Content cannot be empty.'})
 
-        try:  
-            task = Task.objects.select_related('board').get(pk=task_id)
-        except Task.DoesNotExist:
-            raise NotFound('Task not found')
-
-        board = task.board
-        if not board:
-            raise NotFound('Board not found')
-        if user != board.user and user not in board.members.all():
-            raise PermissionDenied("You are not a member of the board.")
-        
-        serializer.save(author=user, task_id=task_id)
+        with atomic():
+            comment = serializer.save(author=self.request.user, task=task)
+            Task.objects.filter(pk=task.pk).update(comment_count=F('comment_count') + 1)
+        activity.record(task.board_id, 'comment_created', self.request.user, task.pk, comment_id=comment.pk)
 
 
 class CommentsDetail(generics.RetrieveDestroyAPIView):
@@ -161,7 +587,7 @@ class CommentsDetail(generics.RetrieveDestroyAPIView):
         comment_id = self.kwargs['comment_id']
 
         try:
-            comment = Comment.objects.select_related("task__board").get(
+            comment = Comment.objects.with_access(self.request.user).select_related("task").get(
                 id=comment_id, task_id=task_id
             )
         except Comment.DoesNotExist:
@@ -170,7 +596,15 @@ class CommentsDetail(generics.RetrieveDestroyAPIView):
         self.check_object_permissions(self.request, comment)
         return comment
 
-class AssignedTasksList(generics.ListAPIView):
+    def perform_destroy(self, instance):
+        with atomic():
+            deleted, _ = Comment.objects.filter(pk=instance.pk).delete()
+            if deleted:
+                Task.objects.filter(pk=instance.task_id).update(comment_count=F('comment_count') - 1)
+        if deleted:
+            activity.record(instance.task.board_id, 'comment_deleted', self.request.user, instance.task_id, comment_id=instance.pk)
+
+class AssignedTasksList(TaskProjectionListMixin, generics.ListAPIView):
     """
     API endpoint for listing tasks assigned to a user.
 
@@ -179,13 +613,18 @@ class AssignedTasksList(generics.ListAPIView):
     """
     serializer_class = TaskSerializer
     permission_classes = [ IsAuthenticated]
+    throttle_scope = 'tasks'
 
     def get_queryset(self):     
         user = self.request.user    
-        return Task.objects.filter(assignee=user).select_related('board', 'assignee', 'reviewer')
+        return Task.objects.visible_to(user).exclude_templates().filter(assignee=user)
 
+    def get_archived_queryset(self):
+        user = self.request.user
+        return ArchivedTask.objects.visible_to(user).exclude_templates().filter(assignee=user)
 
-class ReviewedTasksList(generics.ListAPIView):
+
+class ReviewedTasksList(TaskProjectionListMixin, generics.ListAPIView):
     """
     API endpoint for listing tasks assigned to a user for reviewing.
 
@@ -194,7 +633,124 @@ class ReviewedTasksList(generics.ListAPIView):
     """
     serializer_class = TaskSerializer
     permission_classes = [ IsAuthenticated]
+    throttle_scope = 'tasks'
 
     def get_queryset(self):   
         user = self.request.user    
-        return Task.objects.filter(reviewer=user).select_related('board', 'assignee', 'reviewer')
\ No newline at end of file
+        return Task.objects.visible_to(user).exclude_templates().filter(reviewer=user)
+
+    def get_archived_queryset(self):
+        user = self.request.user
+        return ArchivedTask.objects.visible_to(user).exclude_templates().filter(reviewer=user)
+
+
+class TaskCalendar(APIView):
+    """
+    API endpoint for the calendar of the authenticated user.
+
+    Returns the tasks due between ``?from=`` and ``?to=`` (ISO dates, both inclusive)
+    of boards where the user is a member or owner, and the number of tasks per day.
+    ``?filter=assigned-to-me`` or ``?filter=reviewing`` narrows the tasks like the
+    lists of the same name. The window is read from the due date index, so the
+    cost follows the size of the window and not the number of tasks.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'tasks'
+    max_days = 366
+    filters = {
+        'assigned-to-me': 'assignee',
+        'reviewing': 'reviewer',
+    }
+
+    def get_date(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            raise ValidationError({'detail': f'{name} is required.'})
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({'detail': f'{name} must be a date (YYYY-MM-DD).'})
+
+    def get(self, request):
+        start, end = self.get_date('from'), self.get_date('to')
+        if end < start:
+            raise ValidationError({'detail': 'to must not be before from.'})
+        if (end - start).days >= self.max_days:
+            raise ValidationError({'detail': f'The window must not be longer than {self.max_days} days.'})
+
+        role = request.query_params.get('filter')
+        if role and role not in self.filters:
+            raise ValidationError({'detail': f'filter must be one of: {", ".join(self.filters)}.'})
+
+        def list_shard():
+            tasks = Task.objects.visible_to(request.user).exclude_templates().filter(due_date__range=(start, end))
+            if role:
+                tasks = tasks.filter(**{self.filters[role]: request.user})
+            return add_unread_counts(request.user, project_tasks(tasks.order_by('due_date', 'id')), tasks)
+
+        tasks = sorted(
+            (task for shard_tasks in fan_out(request.user, list_shard) for task in shard_tasks),
+            key=lambda task: (task['due_date'], task['id']),
+        )
+        days = Counter(task['due_date'] for task in tasks)
+        return Response({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'days': dict(days),
+            'tasks': tasks,
+        })
+
+
+class SummaryView(APIView):
+    """
+    API endpoint for the dashboard summary of the authenticated user.
+
+    Returns task counts by status and priority, urgent and overdue counts and
+    the next due date across all boards where the user is a member or owner.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_summary(request.user))
+
+
+class BatchView(APIView):
+    """
+    API endpoint for running several API requests in one round trip.
+
+    Takes a list of sub-requests to the other API routes and returns the status,
+    headers and body of each, in order. The user is authenticated once for the
+    whole batch. With ``atomic`` the sub-requests run in one transaction that is
+    rolled back, with status 400, as soon as one of them fails.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results, committed = run_batch(request, serializer.validated_data['requests'], serializer.validated_data['atomic'])
+        if not committed:
+            return Response({'detail': 'The batch was rolled back.', 'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': results})
+
+
+class UserSearch(APIView):
+    """
+    API endpoint for finding users to add as board members.
+
+    Returns up to ``?limit=`` users whose email or fullname starts with ``?q=``
+    (case-insensitive), people who already share a board with the user first.
+    Results may be up to ``KANMIND_USER_SEARCH['CACHE_SECONDS']`` old.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 10
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'detail': 'q is required.'})
+        options = settings.KANMIND_USER_SEARCH
+        limit = get_limit(request, min(self.default_limit, options['MAX_RESULTS']), options['MAX_RESULTS'])
+        response = Response(cached_search_users(request.user, query, limit))
+        patch_cache_control(response, private=True, max_age=options['CACHE_SECONDS'])
+        return response
@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class KanmindAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kan_mind_app'
+
+    def ready(self):
+        from .sharding import prepare_shard
+        post_migrate.connect(prepare_shard, sender=self)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedTask, Comment, Task
+from .ranking import needs_rebalance, rank_at_end, schedule_rebalance
+from .sharding import all_databases, atomic, use_shard
+from .summary import invalidate_summaries
+
+TASK_FIELDS = (
+    'id', 'board_id', 'title', 'description', 'status', 'priority', 'assignee_id',
+    'reviewer_id', 'due_date', 'creator_id', 'comment_count', 'done_at', 'position', 'version',
+)
+COMMENT_FIELDS = ('id', 'task_id', 'created_at', 'author_id', 'content')
+
+
+def archive_done_tasks(days, batch_size=500):
+    """
+    Moves tasks that have been done for more than `days` days, with their
+    comments, into the archive tables of every database with board data.
+    Each batch is its own transaction, so the write lock is only held for
+    `batch_size` tasks at a time. Returns the number of archived tasks.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = 0
+    for using in all_databases():
+        with use_shard(using):
+            while True:
+                with atomic():
+                    ids = list(
+                        Task.objects.filter(done_at__lt=cutoff).order_by('done_at').values_list('id', flat=True)[:batch_size]
+                    )
+                    if not ids:
+                        break
+                    tasks = Task.objects.filter(pk__in=ids)
+                    board_ids = set(tasks.values_list('board_id', flat=True))
+                    ArchivedTask.objects.bulk_create(ArchivedTask(**row) for row in tasks.values(*TASK_FIELDS))
+                    comments = Comment.objects.filter(task_id__in=ids)
+                    ArchivedComment.objects.bulk_create(ArchivedComment(**row) for row in comments.values(*COMMENT_FIELDS))
+                    comments.delete()
+                    tasks.delete()
+                invalidate_summaries(board_ids)
+                archived += len(ids)
+    return archived
+
+
+def restore_task(archived_task):
+    """
+    Moves an archived task and its comments back into the hot tables with their
+    original primary keys. `done_at` restarts, so the task is not archived again right away.
+    The version moves on, so no ETag issued before the task was archived matches again.
+    The task gets a fresh rank at the end of its column, because its old rank
+    may have been given to another task since.
+    """
+    with atomic():
+        task = Task(**{field: getattr(archived_task, field) for field in TASK_FIELDS})
+        task.done_at = None
+        task.version += 1
+        task.position = rank_at_end(task.board_id, task.status)
+        task.save(force_insert=True)
+
+        comments = archived_task.comments.all()
+        Comment.objects.bulk_create(Comment(**row) for row in comments.values(*COMMENT_FIELDS))
+        # created_at is auto_now_add, so bulk_create stamped the restore time; copy the original back.
+        Comment.objects.filter(task_id=task.pk).update(created_at=Subquery(
+            ArchivedComment.objects.filter(pk=OuterRef('pk')).values('created_at')[:1]
+        ))
+        archived_task.delete()
+    if needs_rebalance(task.position):
+        schedule_rebalance(task.board_id, task.status)
+    invalidate_summaries([task.board_id])
+    return task
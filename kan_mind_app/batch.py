@@ -0,0 +1,175 @@
+"""
+In-process execution of batched API requests for `POST /api/batch/`.
+
+Every sub-request is turned into a regular request for the existing view
+and dispatched without another round trip. The user is authenticated once
+for the whole batch and handed to the views as forced authentication, so
+views still run their own permission checks and throttles.
+
+Consecutive read-only sub-requests run in parallel threads unless the batch
+is atomic; an atomic batch runs one by one inside a transaction on every
+database and is rolled back as soon as one sub-request fails.
+
+Only GET/HEAD/OPTIONS requests whose views never write run in parallel.
+Reads that write as a side effect are listed in `WRITING_READS` and run in
+order like writes: listing comments moves the read marker of the user, and
+parallel writers would fail with "database is locked" on SQLite.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, nullcontext
+from contextvars import copy_context
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.urls import Resolver404, resolve
+
+from . import activity
+from .sharding import all_databases, use_shard_of
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+NOT_FORWARDED = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'PATH_INFO', 'REQUEST_METHOD', 'wsgi.input',
+    'HTTP_IDEMPOTENCY_KEY', 'HTTP_IF_MATCH',
+)
+# Headers a sub-request may set itself.
+ITEM_HEADERS = ('If-Match',)
+# Url names of routes whose safe methods write (CommentsList.list marks the comments read).
+WRITING_READS = {'comments-list'}
+
+
+def result(status, body=None, headers=None):
+    return {'status': status, 'headers': headers or {}, 'body': body}
+
+
+def build_request(parent, method, path, body, headers=None):
+    """A request for `path` that carries the headers and the user of `parent`."""
+    path, _, query = path.partition('?')
+    payload = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in parent.META.items() if key not in NOT_FORWARDED}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': BytesIO(payload),
+    })
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    request = WSGIRequest(environ)
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def dispatch(parent, item):
+    """Runs one sub-request and returns its result and the activity events it recorded."""
+    path = item['path']
+    try:
+        match = resolve(path.partition('?')[0])
+    except Resolver404:
+        return result(404, {'detail': 'Not found.'}), []
+    if match.url_name == 'batch':
+        return result(400, {'detail': 'Batches cannot be nested.'}), []
+
+    request = build_request(parent, item['method'], path, item.get('body'), item.get('headers'))
+    pinned = use_shard_of(match.kwargs['pk']) if 'pk' in match.kwargs else nullcontext()
+    with pinned, activity.buffered() as events:
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Batched request %s %s failed', item['method'], path)
+            return result(500, {'detail': 'A server error occurred.'}), []
+        events = list(events)
+
+    if hasattr(response, 'data'):
+        body = response.data
+    else:
+        content = response.content.decode(response.charset)
+        try:
+            body = json.loads(content) if content else None
+        except ValueError:
+            body = content
+    headers = {name: value for name, value in response.items() if name not in ('Content-Type', 'Content-Length')}
+    return result(response.status_code, body, headers), events
+
+
+def runs_in_parallel(item):
+    """Whether a sub-request only reads and may share the thread pool with other reads."""
+    if item['method'] not in SAFE_METHODS:
+        return False
+    try:
+        return resolve(item['path'].partition('?')[0]).url_name not in WRITING_READS
+    except Resolver404:
+        return True
+
+
+def dispatch_in_thread(parent, item):
+    try:
+        return dispatch(parent, item)
+    finally:
+        connections.close_all()
+
+
+def run_parallel(parent, items):
+    workers = min(len(items), settings.KANMIND_BATCH['MAX_WORKERS'])
+    if workers <= 1:
+        return [dispatch(parent, item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(copy_context().run, dispatch_in_thread, parent, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def run_batch(parent, items, atomic=False):
+    """
+    Runs the sub-requests of a batch and returns ``(results, committed)``.
+    Results are in request order; `committed` is False when an atomic batch
+    was rolled back.
+    """
+    if atomic:
+        return run_atomic(parent, items)
+
+    outcomes = []
+    reads = []
+    for item in items:
+        if runs_in_parallel(item):
+            reads.append(item)
+            continue
+        outcomes.extend(run_parallel(parent, reads))
+        reads = []
+        outcomes.append(dispatch(parent, item))
+    outcomes.extend(run_parallel(parent, reads))
+
+    results = []
+    for outcome, events in outcomes:
+        if outcome['status'] < 400:
+            activity.keep(events)
+        results.append(outcome)
+    return results, True
+
+
+def run_atomic(parent, items):
+    databases = list(dict.fromkeys([DEFAULT_DB_ALIAS, *all_databases()]))
+    results = []
+    kept_events = []
+    with ExitStack() as stack:
+        for alias in databases:
+            stack.enter_context(transaction.atomic(using=alias))
+        for index, item in enumerate(items):
+            outcome, events = dispatch(parent, item)
+            results.append(outcome)
+            if outcome['status'] >= 400:
+                for alias in databases:
+                    transaction.set_rollback(True, using=alias)
+                skipped = result(424, {'detail': f'Not run, request {index} of the batch failed.'})
+                results.extend(dict(skipped) for _ in items[index + 1:])
+                return results, False
+            kept_events.extend(events)
+    activity.keep(kept_events)
+    return results, True
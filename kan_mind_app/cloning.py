@@ -0,0 +1,72 @@
+from django.utils import timezone
+
+from .models import DONE_STATUS, Board, Comment, Task
+from .sharding import add_to_directory, allocate_board_id, atomic, current_db
+from .summary import invalidate_summaries
+
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'assignee_id', 'reviewer_id', 'due_date', 'position', 'comment_count')
+COMMENT_FIELDS = ('task_id', 'author_id', 'content')
+# Rows per INSERT of copied tasks and comments. The database may split batches further:
+# SQLite allows 999 parameters per statement, i.e. about 70 tasks or 240 comments.
+BATCH_SIZE = 500
+
+
+def clone_board(board, user, title=None, include_tasks=True, include_members=False,
+                include_comments=False, as_template=False):
+    """
+    Copies a board for `user` in one transaction: rows are read with `values()`,
+    written with `bulk_create` in batches of `BATCH_SIZE`, and comments are
+    re-pointed to the new tasks through an old-id to new-id map. That is a fixed
+    number of reads and writes plus one INSERT per batch, so the query count
+    grows with rows / batch size, not with one query per row.
+
+    Without members, assignees and reviewers other than `user` are cleared,
+    because they would not be members of the copy. With split board data the
+    copy is placed in the shard of the source board.
+    """
+    now = timezone.now()
+    board_id = allocate_board_id(shard=current_db())
+    with atomic():
+        clone = Board.objects.create(id=board_id, user=user, title=title or board.title, is_template=as_template)
+
+        member_ids = set()
+        if include_members:
+            member_ids = set(Board.members.through.objects.filter(board_id=board.pk).values_list('user_id', flat=True))
+            member_ids.add(board.user_id)
+            member_ids.discard(user.pk)
+            Board.members.through.objects.bulk_create(
+                [Board.members.through(board_id=clone.pk, user_id=user_id) for user_id in member_ids]
+            )
+        allowed = member_ids | {user.pk}
+
+        if include_tasks:
+            rows = list(Task.objects.filter(board_id=board.pk).order_by('id').values(*TASK_FIELDS))
+            new_tasks = Task.objects.bulk_create([
+                Task(
+                    board_id=clone.pk,
+                    creator_id=user.pk,
+                    title=row['title'],
+                    description=row['description'],
+                    status=row['status'],
+                    priority=row['priority'],
+                    assignee_id=row['assignee_id'] if row['assignee_id'] in allowed else None,
+                    reviewer_id=row['reviewer_id'] if row['reviewer_id'] in allowed else None,
+                    due_date=row['due_date'],
+                    position=row['position'],
+                    comment_count=row['comment_count'] if include_comments else 0,
+                    done_at=now if row['status'] == DONE_STATUS else None,
+                )
+                for row in rows
+            ], batch_size=BATCH_SIZE)
+            new_ids = {row['id']: task.pk for row, task in zip(rows, new_tasks)}
+
+            if include_comments and new_ids:
+                comments = Comment.objects.filter(task__board_id=board.pk).order_by('id').values(*COMMENT_FIELDS)
+                Comment.objects.bulk_create([
+                    Comment(task_id=new_ids[row['task_id']], author_id=row['author_id'], content=row['content'])
+                    for row in comments
+                ], batch_size=BATCH_SIZE)
+
+    add_to_directory(clone.pk, {user.pk} | member_ids)
+    invalidate_summaries([clone.pk])
+    return clone
@@ -0,0 +1,64 @@
+"""
+Windowed loading of the status columns of a board.
+
+A board is opened with the first tasks of every status column plus the
+number of tasks per column; the rest of a column is fetched page by page
+with an opaque cursor. Pages are read in column order (`position`, `id`)
+from the ``(board, status, position, id)`` index, so every page costs one
+index range scan of its own size, independent of the size of the board.
+"""
+import base64
+import json
+
+from django.db.models import Count, Q
+
+from .models import Task
+
+
+def encode_cursor(task):
+    """The cursor of the page after `task`."""
+    return base64.urlsafe_b64encode(json.dumps([task.position, task.pk]).encode()).decode()
+
+
+def decode_cursor(value):
+    """Returns ``(position, id)`` of a cursor; raises ValueError for invalid ones."""
+    try:
+        position, task_id = json.loads(base64.urlsafe_b64decode(value.encode()))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Invalid cursor.')
+    if not isinstance(position, str) or not isinstance(task_id, int):
+        raise ValueError('Invalid cursor.')
+    return position, task_id
+
+
+def column_page(board_id, status, limit, cursor=None):
+    """
+    Returns up to `limit` tasks of a column after `cursor` and the cursor of
+    the next page, None on the last page.
+    """
+    tasks = Task.objects.filter(board_id=board_id, status=status)
+    if cursor:
+        position, task_id = decode_cursor(cursor)
+        tasks = tasks.filter(Q(position__gt=position) | Q(position=position, id__gt=task_id))
+    tasks = list(tasks.order_by('position', 'id')[:limit + 1])
+    next_cursor = encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    return tasks[:limit], next_cursor
+
+
+def first_pages(board_id, limit):
+    """
+    Returns the first `limit` tasks of every column of a board, in column
+    order, and per column its `status`, `total` and `next_cursor`.
+    """
+    totals = (
+        Task.objects.filter(board_id=board_id)
+        .order_by('status')
+        .values('status')
+        .annotate(total=Count('id'))
+    )
+    tasks, columns = [], []
+    for row in totals:
+        page, next_cursor = column_page(board_id, row['status'], limit)
+        tasks.extend(page)
+        columns.append({'status': row['status'], 'total': row['total'], 'next_cursor': next_cursor})
+    return tasks, columns
@@ -0,0 +1,49 @@
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import ArchivedComment, ArchivedTask, Board, Comment, Task, TaskEvent, TaskReadMarker
+from .sharding import atomic, remove_from_directory, use_shard_of
+from .summary import invalidate_summaries
+
+CHUNK_SIZE = 500
+
+
+def schedule_board_deletion(board):
+    """
+    Hides the board from every query right away and queues the actual delete
+    for the worker, so the request never cascades through all tasks and comments.
+    """
+    invalidate_summaries([board.pk])
+    with atomic():
+        Board.objects.filter(pk=board.pk).update(deleted_at=timezone.now())
+        enqueue('delete_board', board_id=board.pk)
+
+
+def delete_in_chunks(queryset, chunk_size):
+    while True:
+        with atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return
+            queryset.model._base_manager.filter(pk__in=ids).delete()
+
+
+def delete_board(board_id, chunk_size=CHUNK_SIZE):
+    """
+    Job handler for 'delete_board'. Deletes the children of a board marked as
+    deleted in small transactions, then the board itself.
+    """
+    with use_shard_of(board_id):
+        board = Board.objects.filter(pk=board_id, deleted_at__isnull=False).first()
+        if board is None:
+            return
+        delete_in_chunks(Comment.objects.filter(task__board_id=board_id), chunk_size)
+        delete_in_chunks(TaskReadMarker.objects.filter(task__board_id=board_id), chunk_size)
+        delete_in_chunks(Task.objects.filter(board_id=board_id), chunk_size)
+        delete_in_chunks(ArchivedComment.objects.filter(task__board_id=board_id), chunk_size)
+        delete_in_chunks(ArchivedTask.objects.filter(board_id=board_id), chunk_size)
+        delete_in_chunks(TaskEvent.objects.filter(board_id=board_id), chunk_size)
+        with atomic():
+            board.members.clear()
+            board.delete()
+    remove_from_directory(board_id)
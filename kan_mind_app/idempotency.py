@@ -0,0 +1,106 @@
+"""
+Idempotency keys for retried POSTs.
+
+A client that sends an ``Idempotency-Key`` header claims the key for its user
+with an insert into `IdempotencyKey`. The unique constraint on user and key
+makes the claim atomic: exactly one request runs, and its response is stored
+once it is ready. Retries with the same key get the stored response replayed
+without running the view again.
+
+A duplicate that arrives while the first request is still running polls the
+row for up to ``WAIT`` seconds and replays the result, so concurrent
+duplicates are serialized instead of both creating objects. A key that is
+reused for a different request body or path is rejected.
+
+Responses with status 429 or 5xx are not stored; the key is released, so a
+retry runs again. Keys of crashed requests are taken over after
+``LOCK_TIMEOUT``, stored responses expire after ``TTL`` seconds.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress.'
+    default_code = 'idempotency_key_in_use'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def fingerprint(request):
+    """A hash of the method, path and parsed body of a DRF request."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def claim(user, key, request_fingerprint):
+    """
+    Claims `key` for the user. Returns ``(record, True)`` when the caller must
+    run the request and then `complete()` or `release()` the record, and
+    ``(record, False)`` when the stored response of the record is to be replayed.
+    """
+    options = settings.KANMIND_IDEMPOTENCY
+    deadline = time.monotonic() + options['WAIT']
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=request_fingerprint,
+                    created_at=now, expires_at=now + timedelta(seconds=options['TTL']),
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            continue
+        stale = record.status_code is None and record.created_at <= now - timedelta(seconds=options['LOCK_TIMEOUT'])
+        if record.expires_at <= now or stale:
+            IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+            continue
+        if record.fingerprint != request_fingerprint:
+            raise IdempotencyKeyReused()
+        if record.status_code is not None:
+            return record, False
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInUse()
+        time.sleep(POLL_INTERVAL)
+
+
+def complete(record, status_code, data):
+    """Stores the response of a claimed key; 429 and 5xx release it instead."""
+    if status_code >= 500 or status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        release(record)
+        return
+    IdempotencyKey.objects.filter(pk=record.pk).update(status_code=status_code, response=data)
+
+
+def release(record):
+    """Frees a claimed key without storing a response, so a retry runs again."""
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+def purge_expired():
+    """Deletes expired keys. Returns the number deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
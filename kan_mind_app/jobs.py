@@ -0,0 +1,80 @@
+"""
+Lightweight job queue stored in the `Job` table.
+
+Jobs are enqueued with `enqueue(kind, **payload)` and processed by
+`manage.py run_kanmind_worker`. Handlers are looked up by kind in
+`JOB_HANDLERS` (dotted paths) and are called with the payload as keyword
+arguments. Register new maintenance jobs by adding them there.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+JOB_HANDLERS = {
+    'delete_board': 'kan_mind_app.deletion.delete_board',
+    'archive_tasks': 'kan_mind_app.archive.archive_done_tasks',
+    'rebalance_column': 'kan_mind_app.ranking.rebalance_column',
+}
+MAX_ATTEMPTS = 5
+LEASE = timedelta(minutes=10)
+
+
+def enqueue(kind, **payload):
+    """Adds a job to the queue. Call inside the transaction of the triggering write."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def claim_next():
+    """
+    Claims the oldest due job, or returns None. The conditional UPDATE makes
+    the claim safe with several workers; running jobs whose lease expired
+    (crashed worker) are picked up again.
+    """
+    now = timezone.now()
+    claimable = Q(status=Job.PENDING) | Q(status=Job.RUNNING, locked_at__lt=now - LEASE)
+    for job_id in Job.objects.filter(claimable, run_after__lte=now).order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        claimed = Job.objects.filter(claimable, pk=job_id).update(status=Job.RUNNING, locked_at=now)
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """
+    Runs the handler of a claimed job. Failures are retried with exponential
+    backoff until MAX_ATTEMPTS, then the job is marked as failed.
+    """
+    job.attempts += 1
+    try:
+        import_string(JOB_HANDLERS[job.kind])(**job.payload)
+    except Exception as exc:
+        job.last_error = f'{type(exc).__name__}: {exc}'
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+    else:
+        job.status = Job.DONE
+        job.last_error = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'attempts', 'run_after', 'locked_at', 'last_error'])
+    return job
+
+
+def run_pending(limit=None):
+    """Runs due jobs until the queue is empty or `limit` jobs ran. Returns the number run."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kan_mind_app.archive import archive_done_tasks
+
+
+class Command(BaseCommand):
+    """
+    Moves tasks that have been done for longer than `--days` days, with their
+    comments, into the archive tables. Meant to run periodically (e.g. from cron).
+    """
+    help = 'Archive tasks that have been done for longer than N days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.KANMIND_ARCHIVE_AFTER_DAYS,
+                            help='Archive tasks done for longer than this many days.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Tasks moved per transaction.')
+
+    def handle(self, *args, **options):
+        archived = archive_done_tasks(options['days'], options['batch_size'])
+        self.stdout.write(f'Archived {archived} task(s).')
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from kan_mind_app.api.projections import project_tasks
+from kan_mind_app.api.serializers import BoardDetailSerializer
+from kan_mind_app.management.seeding import seed_board
+from kan_mind_app.models import Board, Task
+from kanmind_core.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    """
+    Compares DRF's `JSONRenderer` with `FastJSONRenderer` on a large board.
+    Seeds the board inside a transaction that is rolled back and reports render
+    time and response size for the BoardDetail payload with all tasks of the
+    board and the TasksList payload.
+    """
+    help = 'Benchmark the JSON renderers on a large board.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Number of tasks to seed.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer, the best one is reported.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            board, _ = seed_board(options['tasks'])
+            board = Board.objects.prefetch_related('members').get(pk=board.pk)
+            # A column limit of the whole board renders every task, not only the first page of each column.
+            context = {'column_limit': max(options['tasks'], 1)}
+            payloads = {
+                'BoardDetail': BoardDetailSerializer(board, context=context).data,
+                'TasksList': project_tasks(Task.objects.filter(board=board).order_by('id')),
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"tasks: {options['tasks']}, orjson: {'installed' if orjson else 'not installed'}")
+        for name, data in payloads.items():
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                elapsed, size = self.measure(renderer, data, options['repeat'])
+                self.stdout.write(
+                    f'{name:<12} {type(renderer).__name__:<17} {elapsed * 1000:8.1f} ms {size:>10} bytes'
+                )
+
+    def measure(self, renderer, data, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rendered = renderer.render(data, 'application/json')
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(rendered)
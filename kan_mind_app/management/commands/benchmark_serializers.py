@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from kan_mind_app.api.projections import project_tasks
+from kan_mind_app.api.serializers import TaskSerializer
+from kan_mind_app.management.seeding import seed_board
+from kan_mind_app.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Compares `TaskSerializer` with the `values()` projection used by the task
+    list endpoints. Seeds a board inside a transaction that is rolled back,
+    checks that both render byte-identical JSON and reports the time per 10k tasks.
+    """
+    help = 'Benchmark TaskSerializer against the read-only task projection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Number of tasks to seed.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per variant, the best one is reported.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            board, _ = seed_board(options['tasks'])
+            queryset = Task.objects.filter(board=board).order_by('id')
+            serializer_time, serializer_json = self.measure(
+                lambda: TaskSerializer(queryset.select_related('assignee', 'reviewer'), many=True).data,
+                options['repeat'],
+            )
+            projection_time, projection_json = self.measure(lambda: project_tasks(queryset), options['repeat'])
+            transaction.set_rollback(True)
+
+        if serializer_json != projection_json:
+            raise CommandError('Projection output differs from TaskSerializer output.')
+
+        per_10k = 10000 / options['tasks']
+        self.stdout.write(f"tasks: {options['tasks']}, identical JSON: yes ({len(projection_json)} bytes)")
+        self.stdout.write(f'TaskSerializer: {serializer_time * per_10k * 1000:.1f} ms per 10k tasks')
+        self.stdout.write(f'projection:     {projection_time * per_10k * 1000:.1f} ms per 10k tasks')
+        self.stdout.write(f'speedup:        {serializer_time / projection_time:.1f}x')
+
+    def measure(self, serialize, repeat):
+        renderer = JSONRenderer()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = serialize()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, renderer.render(data)
@@ -0,0 +1,257 @@
+import datetime
+import json
+import re
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from kan_mind_app.archive import archive_done_tasks
+from kan_mind_app.management.seeding import seed_board
+from kan_mind_app.models import Board, Comment, Task
+from kan_mind_app.sharding import is_sharded
+
+BASELINE = Path(__file__).resolve().parents[1] / 'query_plans.json'
+PASSWORD = 'plan-check-password'
+
+# (label, method, path, body); paths are formatted with the ids of the seeded objects.
+# Requests that delete objects run last.
+ENDPOINTS = [
+    ('board-list', 'GET', '/api/boards/', None),
+    ('board-create', 'POST', '/api/boards/', {'title': 'Plan check board', 'members': ['{member}']}),
+    ('board-detail', 'GET', '/api/boards/{board}/', None),
+    ('board-update', 'PATCH', '/api/boards/{board}/', {'title': 'Renamed board'}),
+    ('board-column', 'GET', '/api/boards/{board}/columns/to-do/?limit=10', None),
+    ('board-activity', 'GET', '/api/boards/{board}/activity/', None),
+    ('board-clone', 'POST', '/api/boards/{board}/clone/', {'include_tasks': True}),
+    ('board-read', 'POST', '/api/boards/{board}/read/', None),
+    ('tasks-list', 'GET', '/api/tasks/', None),
+    ('tasks-create', 'POST', '/api/tasks/', {
+        'board': '{board}', 'title': 'Plan check task', 'description': 'Created by check_query_plans', 'status': 'to-do',
+        'priority': 'high', 'assignee_id': '{member}', 'due_date': '2025-03-01',
+    }),
+    ('tasks-detail', 'GET', '/api/tasks/{task}/', None),
+    ('tasks-update', 'PATCH', '/api/tasks/{task}/', {'status': 'review'}),
+    ('tasks-move', 'POST', '/api/tasks/{task}/move/', {'status': 'done', 'after': '{done_task}'}),
+    ('tasks-assigned', 'GET', '/api/tasks/assigned-to-me/', None),
+    ('tasks-review', 'GET', '/api/tasks/reviewing/', None),
+    ('tasks-calendar', 'GET', '/api/tasks/calendar/?from=2025-02-01&to=2025-02-28', None),
+    ('comments-list', 'GET', '/api/tasks/{task}/comments/', None),
+    ('comments-create', 'POST', '/api/tasks/{task}/comments/', {'content': 'Plan check comment'}),
+    ('comments-detail', 'GET', '/api/tasks/{task}/comments/{comment}/', None),
+    ('tasks-archived-restore', 'POST', '/api/tasks/archived/{archived}/restore/', None),
+    ('summary', 'GET', '/api/summary/', None),
+    ('batch', 'POST', '/api/batch/', {'requests': [{'method': 'GET', 'path': '/api/tasks/{task}/'}]}),
+    ('user-search', 'GET', '/api/users/search/?q=plan', None),
+    ('email-check', 'GET', '/api/email-check/?email={email}', None),
+    ('userprofile-list', 'GET', '/api/profiles/', None),
+    ('userprofile-detail', 'GET', '/api/profiles/{profile}/', None),
+    ('registration', 'POST', '/api/registration/', {
+        'fullname': 'plan-check-new', 'email': 'plan-check-new@example.com',
+        'password': PASSWORD, 'repeated_password': PASSWORD,
+    }),
+    ('login', 'POST', '/api/login/', {'email': '{email}', 'password': PASSWORD}),
+    ('comments-delete', 'DELETE', '/api/tasks/{task}/comments/{comment}/', None),
+    ('tasks-delete', 'DELETE', '/api/tasks/{task}/', None),
+    ('board-delete', 'DELETE', '/api/boards/{board}/', None),
+]
+
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+PLACEHOLDER_LIST = re.compile(r'%s(?:, %s)+')
+TABLE_ALIAS = re.compile(r'"(\w+)" (?:AS )?([A-Z]\d+)\b')
+ACCESS = re.compile(r'^(SCAN|SEARCH) (\w+)')
+
+
+def normalize(sql):
+    """The SQL of a statement with `IN (%s, %s, ...)` lists collapsed, so the key does not depend on their length."""
+    return PLACEHOLDER_LIST.sub('%s, ...', sql)
+
+
+def format_value(value, ids):
+    if isinstance(value, str):
+        formatted = value.format(**ids)
+        return int(formatted) if formatted != value and formatted.isdigit() else formatted
+    if isinstance(value, list):
+        return [format_value(item, ids) for item in value]
+    if isinstance(value, dict):
+        return {key: format_value(item, ids) for key, item in value.items()}
+    return value
+
+
+def table_accesses(sql, plan):
+    """
+    Returns ``(kind, table)`` for every table access of a plan, with `kind`
+    ``SCAN`` (a full scan of the table or one of its indexes) or ``SEARCH``
+    (an index lookup). Django's table aliases are resolved to table names.
+    """
+    aliases = dict((alias, table) for table, alias in TABLE_ALIAS.findall(sql))
+    accesses = []
+    for detail in plan:
+        match = ACCESS.match(detail)
+        if match:
+            kind, name = match.groups()
+            accesses.append((kind, aliases.get(name, name)))
+    return accesses
+
+
+class Command(BaseCommand):
+    """
+    Query-plan regression check for the API.
+
+    Seeds users, a board with tasks and comments and an archived task inside a
+    transaction that is rolled back, calls every endpoint of
+    `kan_mind_app/api/views.py` and `user_auth_app/api/views.py` through
+    Django's test client and records the SQL of each request. Every SELECT,
+    UPDATE and DELETE is run through ``EXPLAIN QUERY PLAN`` and compared with
+    the checked-in baseline in `kan_mind_app/management/query_plans.json`.
+
+    The check fails when a statement now scans the task, comment or board
+    membership table where its baseline plan searched it through an index,
+    and when a statement that is not in the baseline (e.g. a rewritten query)
+    scans one of them at all. Other new and gone statements are reported;
+    `--update` rewrites the baseline after an intended change.
+
+    Caches are disabled while the endpoints run, so cached reads still hit
+    the database. Runs against the default database only.
+    """
+    help = 'Check the query plans of the API endpoints against the checked-in baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=400, help='Number of tasks to seed.')
+        parser.add_argument('--update', action='store_true', help='Write the current plans as the new baseline.')
+        parser.add_argument('--baseline', default=str(BASELINE), help='Path of the baseline JSON file.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the plan of every statement.')
+
+    def handle(self, *args, **options):
+        if is_sharded():
+            raise CommandError('Query plans are checked against the default database, run without KANMIND_SHARD_COUNT.')
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans are only checked on SQLite.')
+
+        dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=dummy_cache), transaction.atomic():
+            ids = self.seed(options['tasks'])
+            plans = {label: self.explain(self.capture(method, path, body, ids)) for label, method, path, body in ENDPOINTS}
+            transaction.set_rollback(True)
+
+        if options['verbose_plans']:
+            self.print_plans(plans)
+
+        baseline_path = Path(options['baseline'])
+        if options['update']:
+            baseline_path.write_text(json.dumps(plans, indent=2) + '\n')
+            count = sum(len(statements) for statements in plans.values())
+            self.stdout.write(f'Baseline with {count} statements of {len(plans)} endpoints written to {baseline_path}')
+            return
+        if not baseline_path.exists():
+            raise CommandError(f'No baseline at {baseline_path}, create it with --update.')
+
+        regressions = self.compare(json.loads(baseline_path.read_text()), plans)
+        if regressions:
+            for label, sql, problem, plan in regressions:
+                self.stderr.write(f'{label}: {problem}')
+                self.stderr.write(f'  {sql}')
+                for detail in plan:
+                    self.stderr.write(f'    {detail}')
+            raise CommandError(f'{len(regressions)} query plan regressions, see above. Run with --update if the new plans are intended.')
+        self.stdout.write(self.style.SUCCESS(f'No query plan regressions in {len(plans)} endpoints.'))
+
+    def seed(self, task_count):
+        board, users = seed_board(task_count, comments_per_task=2, prefix='plan-check')
+        user = users[0]
+        user.set_password(PASSWORD)
+        user.save(update_fields=['password'])
+        Token.objects.get_or_create(user=user)
+
+        # Tasks of a board the user is not on, so visibility filters have rows to skip.
+        seed_board(task_count // 4, member_count=2, prefix='plan-check-other')
+        done_task, archived = Task.objects.filter(board=board, status='done').order_by('id')[:2]
+        Task.objects.filter(pk=archived.pk).update(done_at=timezone.now() - datetime.timedelta(days=60))
+        archive_done_tasks(days=30)
+
+        task = Task.objects.filter(board=board, status='to-do').order_by('id').first()
+        return {
+            'user': user,
+            'board': board.pk,
+            'task': task.pk,
+            'done_task': done_task.pk,
+            'comment': Comment.objects.filter(task=task).order_by('id').values_list('id', flat=True).first(),
+            'archived': archived.pk,
+            'member': users[1].pk,
+            'email': user.email,
+            'profile': user.userprofile.pk,
+        }
+
+    def capture(self, method, path, body, ids):
+        """Runs one request and returns the ``(sql, params)`` of its statements."""
+        token = Token.objects.get(user=ids['user']).key
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token}')
+        path = format_value(path, ids)
+        body = format_value(body, ids)
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            if not many:
+                statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = getattr(client, method.lower())(
+                path, data=json.dumps(body) if body is not None else None, content_type='application/json'
+            )
+        if response.status_code >= 400:
+            raise CommandError(f'{method} {path} returned {response.status_code}: {response.content[:200]!r}')
+        return statements
+
+    def explain(self, statements):
+        """Returns ``{normalized sql: plan}`` for the explainable statements, in execution order."""
+        plans = {}
+        with connection.cursor() as cursor:
+            for sql, params in statements:
+                key = normalize(sql)
+                if key in plans or not sql.lstrip().upper().startswith(EXPLAINED):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plans[key] = [row[3] for row in cursor.fetchall()]
+        return plans
+
+    def compare(self, baseline, plans):
+        """
+        Returns ``(label, sql, problem, plan)`` for every watched table that
+        lost its index, and for every watched table scanned by a statement
+        that is not in the baseline.
+        """
+        watched = {Task._meta.db_table, Comment._meta.db_table, Board.members.through._meta.db_table}
+        regressions = []
+        for label, statements in plans.items():
+            expected = baseline.get(label)
+            if expected is None:
+                self.stdout.write(self.style.WARNING(f'{label}: not in the baseline'))
+                expected = {}
+            for sql, plan in statements.items():
+                after = table_accesses(sql, plan)
+                if sql not in expected:
+                    self.stdout.write(self.style.WARNING(f'{label}: new statement {sql}'))
+                    for table in sorted(watched):
+                        if ('SCAN', table) in after:
+                            regressions.append((label, sql, f'new statement scans {table}', plan))
+                    continue
+                before = table_accesses(sql, expected[sql])
+                for table in sorted(watched):
+                    scans_before = before.count(('SCAN', table))
+                    if after.count(('SCAN', table)) > scans_before and ('SEARCH', table) in before:
+                        regressions.append((label, sql, f'{table} is scanned instead of searched through an index', plan))
+            for sql in expected.keys() - statements.keys():
+                self.stdout.write(self.style.WARNING(f'{label}: statement no longer run {sql}'))
+        return regressions
+
+    def print_plans(self, plans):
+        for label, statements in plans.items():
+            self.stdout.write(label)
+            for sql, plan in statements.items():
+                self.stdout.write(f'  {sql}')
+                for detail in plan:
+                    self.stdout.write(f'    {detail}')
@@ -0,0 +1,263 @@
+import json
+import logging
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from kan_mind_app.management.seeding import seed_board
+from kan_mind_app.models import Board, Task
+
+DEFAULT_MIX = 'board_list=3,board_detail=2,task_detail=2,task_create=1,task_update=1,task_delete=1,comment_post=2'
+ROUTES = {part.partition('=')[0] for part in DEFAULT_MIX.split(',')}
+
+
+class InProcessTransport:
+    """Sends requests through Django's test client, without a server."""
+    def __init__(self, token):
+        self.client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token}')
+
+    def request(self, method, path, body=None):
+        response = getattr(self.client, method.lower())(
+            path, data=json.dumps(body) if body is not None else None, content_type='application/json'
+        )
+        return response.status_code, response.content
+
+
+class HTTPTransport:
+    """Sends requests to a running KanMind server."""
+    def __init__(self, token, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f'Token {token}', 'Content-Type': 'application/json'}
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+
+class VirtualUser:
+    """
+    One simulated client. Picks routes from the traffic mix and only updates
+    or deletes tasks it created itself, so runs can be repeated.
+    """
+    def __init__(self, transport, board_id, task_ids, user_ids, mix, seed):
+        self.transport = transport
+        self.board_id = board_id
+        self.task_ids = task_ids
+        self.user_ids = user_ids
+        self.own_task_ids = []
+        self.routes, self.weights = zip(*mix.items())
+        self.random = random.Random(seed)
+
+    def task_payload(self):
+        return {
+            'board': self.board_id,
+            'title': 'Load test task',
+            'description': 'Created by manage.py loadtest',
+            'status': self.random.choice(['to-do', 'in-progress', 'review', 'done']),
+            'priority': self.random.choice(['low', 'medium', 'high']),
+            'assignee_id': self.random.choice(self.user_ids),
+            'due_date': timezone.localdate().isoformat(),
+        }
+
+    def step(self):
+        route = self.random.choices(self.routes, self.weights)[0]
+        if route in ('task_update', 'task_delete') and not self.own_task_ids:
+            route = 'task_create'
+
+        if route == 'board_list':
+            call = ('GET', '/api/boards/', None)
+        elif route == 'board_detail':
+            call = ('GET', f'/api/boards/{self.board_id}/', None)
+        elif route == 'task_detail':
+            call = ('GET', f'/api/tasks/{self.random.choice(self.task_ids)}/', None)
+        elif route == 'task_create':
+            call = ('POST', '/api/tasks/', self.task_payload())
+        elif route == 'task_update':
+            call = ('PATCH', f'/api/tasks/{self.random.choice(self.own_task_ids)}/', {'status': 'review'})
+        elif route == 'task_delete':
+            call = ('DELETE', f'/api/tasks/{self.own_task_ids.pop()}/', None)
+        else:
+            call = ('POST', f'/api/tasks/{self.random.choice(self.task_ids)}/comments/', {'content': 'Load test'})
+
+        start = time.perf_counter()
+        try:
+            status, content = self.transport.request(*call)
+        except Exception:
+            status, content = 0, b''
+        elapsed = time.perf_counter() - start
+
+        if route == 'task_create' and status == 201:
+            self.own_task_ids.append(json.loads(content)['id'])
+        return route, status, elapsed
+
+
+def run_worker(worker):
+    """Runs the virtual users of one worker until the deadline. Returns (route, status, seconds) samples."""
+    tokens, board_id, task_ids, user_ids, mix, url, deadline, seed = worker
+    samples = []
+    lock = threading.Lock()
+
+    def run_user(index, token):
+        transport = HTTPTransport(token, url) if url else InProcessTransport(token)
+        user = VirtualUser(transport, board_id, task_ids, user_ids, mix, seed + index)
+        while time.monotonic() < deadline:
+            sample = user.step()
+            with lock:
+                samples.append(sample)
+        connections.close_all()
+
+    threads = [threading.Thread(target=run_user, args=(i, token)) for i, token in enumerate(tokens)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class Command(BaseCommand):
+    """
+    Load test for the KanMind API.
+
+    Seeds a board with a pool of users (once, reused by later runs), issues
+    an auth token per user and runs a weighted traffic mix from several
+    threads or processes, either in-process through Django's test client or
+    against a running server with `--url`. Reports requests/sec and
+    p50/p95/p99 latency per route and can write the results as JSON.
+
+    The throttle rates in REST_FRAMEWORK apply to load tests as well;
+    throttled requests show up as 429 in the status counts.
+    """
+    help = 'Run a load test against the KanMind API and report latency percentiles per route.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Size of the seeded user pool.')
+        parser.add_argument('--tasks', type=int, default=500, help='Tasks on the seeded board.')
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker threads or processes.')
+        parser.add_argument('--processes', action='store_true', help='Run workers as processes instead of threads.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run.')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted routes (default: {DEFAULT_MIX}).')
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000. In-process if omitted.')
+        parser.add_argument('--output', help='Write machine-readable results to this JSON file.')
+        parser.add_argument('--prefix', default='loadtest', help='Username prefix of the seeded pool.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the traffic mix.')
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix'])
+        board, users = self.get_pool(options)
+        tokens = [Token.objects.get_or_create(user=user)[0].key for user in users]
+        task_ids = list(Task.objects.filter(board=board).values_list('id', flat=True)[:1000])
+        user_ids = [user.pk for user in users]
+
+        workers = max(1, min(options['workers'], len(tokens)))
+        deadline = time.monotonic() + options['duration']
+        jobs = [
+            (tokens[i::workers], board.pk, task_ids, user_ids, mix, options['url'], deadline, options['seed'] + i * 1000)
+            for i in range(workers)
+        ]
+        connections.close_all()
+        # 4xx responses (e.g. throttled requests) are counted in the report instead of logged.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        executor_class = ProcessPoolExecutor if options['processes'] else ThreadPoolExecutor
+        started_at = timezone.now()
+        started = time.monotonic()
+        with executor_class(max_workers=workers) as executor:
+            samples = [sample for result in executor.map(run_worker, jobs) for sample in result]
+        elapsed = time.monotonic() - started
+
+        results = self.summarize(samples, started_at, elapsed, options)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            route, _, weight = part.partition('=')
+            route = route.strip()
+            if route not in ROUTES:
+                raise CommandError(f"Unknown route in --mix: {route!r}, expected one of: {', '.join(sorted(ROUTES))}")
+            try:
+                weight = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'Weight of {route} in --mix must be a number: {weight!r}')
+            if not 0 < weight < math.inf:
+                raise CommandError(f'Weight of {route} in --mix must be a finite number greater than 0.')
+            mix[route] = weight
+        return mix
+
+    def get_pool(self, options):
+        prefix = options['prefix']
+        board = Board.objects.live().filter(title=f'{prefix} board').order_by('pk').first()
+        if board is None:
+            self.stdout.write(f"Seeding {options['users']} users and {options['tasks']} tasks...")
+            return seed_board(options['tasks'], member_count=options['users'], prefix=prefix)
+        users = list(User.objects.filter(username__startswith=f'{prefix}-user-').order_by('pk')[:options['users']])
+        return board, users
+
+    def summarize(self, samples, started_at, elapsed, options):
+        by_route = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        for route, status, seconds in samples:
+            by_route[route].append(seconds)
+            statuses[route][str(status)] += 1
+
+        routes = {}
+        for route, latencies in sorted(by_route.items()):
+            latencies.sort()
+            routes[route] = {
+                'requests': len(latencies),
+                'rps': len(latencies) / elapsed,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'statuses': dict(statuses[route]),
+            }
+        return {
+            'started_at': started_at.isoformat(),
+            'target': options['url'] or 'in-process',
+            'workers': options['workers'],
+            'processes': options['processes'],
+            'users': options['users'],
+            'duration_s': elapsed,
+            'requests': len(samples),
+            'rps': len(samples) / elapsed,
+            'routes': routes,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{results['requests']} requests in {results['duration_s']:.1f}s "
+            f"({results['rps']:.1f} req/s) against {results['target']}"
+        )
+        self.stdout.write(f"{'route':<14}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+        for route, stats in results['routes'].items():
+            statuses = ' '.join(f'{code}:{count}' for code, count in sorted(stats['statuses'].items()))
+            self.stdout.write(
+                f"{route:<14}{stats['requests']:>9}{stats['rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+                f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}  {statuses}"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from kan_mind_app.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """
+    Deletes stored Idempotency-Key responses whose TTL has passed.
+    Meant to run periodically (e.g. from cron).
+    """
+    help = 'Delete expired idempotency keys.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(f'Deleted {deleted} expired key(s).')
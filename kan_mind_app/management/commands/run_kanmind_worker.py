@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kan_mind_app.jobs import run_pending
+
+
+class Command(BaseCommand):
+    """
+    Processes the DB-backed job queue (board deletion and other maintenance jobs).
+    Runs until stopped, or drains the queue once with `--once`.
+    """
+    help = 'Run the KanMind background job worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            ran = run_pending()
+            if ran:
+                self.stdout.write(f'Ran {ran} job(s).')
+            if options['once']:
+                return
+            if not ran:
+                time.sleep(options['sleep'])
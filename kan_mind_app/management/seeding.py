@@ -0,0 +1,43 @@
+import datetime
+
+from django.contrib.auth.models import User
+
+from kan_mind_app.models import Board, Comment, Task
+
+STATUSES = ('to-do', 'in-progress', 'review', 'done')
+PRIORITIES = ('low', 'medium', 'high')
+
+
+def seed_board(task_count, member_count=5, comments_per_task=0, prefix='bench'):
+    """
+    Creates a board with `member_count` users and `task_count` tasks using
+    bulk inserts. Used by the benchmark and load test commands.
+    """
+    users = [
+        User.objects.create(username=f'{prefix}-user-{i}', email=f'{prefix}-{i}@example.com')
+        for i in range(member_count)
+    ]
+    board = Board.objects.create(user=users[0], title=f'{prefix} board')
+    board.members.add(*users)
+    Task.objects.bulk_create(
+        Task(
+            board=board,
+            title=f'Task {i}',
+            description='Benchmark task',
+            status=STATUSES[i % len(STATUSES)],
+            priority=PRIORITIES[i % len(PRIORITIES)],
+            assignee=users[i % member_count] if i % 7 else None,
+            reviewer=users[(i + 1) % member_count],
+            due_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i % 365),
+            creator=users[0],
+            comment_count=comments_per_task,
+        )
+        for i in range(task_count)
+    )
+    if comments_per_task:
+        Comment.objects.bulk_create(
+            Comment(task_id=task_id, author=users[i % member_count], content=f'Comment {i}')
+            for task_id in Task.objects.filter(board=board).values_list('id', flat=True)
+            for i in range(comments_per_task)
+        )
+    return board, users
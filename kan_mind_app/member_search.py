@@ -0,0 +1,88 @@
+"""
+Prefix search of users for adding board members.
+
+Matches the start of the email or of the fullname (username) through the
+normalized, indexed columns of `UserProfile`. The prefix is turned into a
+range (``prefix <= column < prefix + U+10FFFF``), which every database
+answers with an index range scan, unlike ``LIKE 'prefix%'``.
+
+People who already share a board with the requester come first. They are
+read with a second query, so both stay limited instead of sorting every
+match. Results are cached briefly per user, prefix and limit.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+
+from user_auth_app.models import normalize
+
+from .models import Board, BoardDirectory
+from .sharding import is_sharded
+
+PREFIX_END = '\U0010ffff'
+FIELDS = ('id', 'email', 'username')
+
+
+def prefix_condition(prefix):
+    upper = prefix + PREFIX_END
+    return (
+        Q(userprofile__normalized_email__gte=prefix, userprofile__normalized_email__lt=upper)
+        | Q(userprofile__normalized_name__gte=prefix, userprofile__normalized_name__lt=upper)
+    )
+
+
+def shares_board_with(user):
+    """
+    A condition on User for everybody who owns or is a member of a board the
+    user can see, evaluated in the default database. With split board data
+    the board directory stands in for the membership table of the shards.
+    """
+    if is_sharded():
+        boards = BoardDirectory.objects.filter(user=user).values('board_id')
+        return Q(pk__in=BoardDirectory.objects.filter(board_id__in=boards).values('user_id'))
+    boards = Board.objects.visible_to(user).values('pk')
+    return (
+        Q(pk__in=Board.members.through.objects.filter(board_id__in=boards).values('user_id'))
+        | Q(pk__in=Board.objects.filter(pk__in=boards).values('user_id'))
+    )
+
+
+def search_users(user, query, limit):
+    """
+    Up to `limit` users whose email or fullname starts with `query`, other
+    than the user, co-members first and then by name. Each in the shape of
+    `MemberSerializer` plus `shares_board`.
+    """
+    prefix = normalize(query)
+    matches = (
+        User.objects.filter(prefix_condition(prefix))
+        .exclude(pk=user.pk)
+        .order_by('userprofile__normalized_name', 'id')
+        .values(*FIELDS)
+    )
+    shared = shares_board_with(user)
+    rows = [dict(row, shares_board=True) for row in matches.filter(shared)[:limit]]
+    if len(rows) < limit:
+        rows += [dict(row, shares_board=False) for row in matches.exclude(shared)[:limit - len(rows)]]
+    return [
+        {'id': row['id'], 'email': row['email'], 'fullname': row['username'], 'shares_board': row['shares_board']}
+        for row in rows
+    ]
+
+
+def search_cache_key(user_id, query, limit):
+    digest = hashlib.sha1(normalize(query).encode()).hexdigest()
+    return f'kanmind:user-search:{user_id}:{limit}:{digest}'
+
+
+def cached_search_users(user, query, limit):
+    """`search_users()` served from a cache of ``KANMIND_USER_SEARCH['CACHE_SECONDS']``."""
+    key = search_cache_key(user.pk, query, limit)
+    results = cache.get(key)
+    if results is None:
+        results = search_users(user, query, limit)
+        cache.set(key, results, settings.KANMIND_USER_SEARCH['CACHE_SECONDS'])
+    return results
@@ -0,0 +1,40 @@
+from . import activity, sharding
+
+
+class ActivityLogMiddleware:
+    """
+    Buffers the activity events recorded while handling a request and writes
+    them with one bulk insert once the response is ready. Events of failed
+    requests are dropped.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with activity.buffered() as events:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                activity.flush(events)
+        return response
+
+
+class ShardPinningMiddleware:
+    """
+    Pins the shard of the board, task or comment id in the url (``pk``) for
+    the whole request, see `kan_mind_app.sharding`. Only installed when the
+    board data is split over several databases.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            token = getattr(request, 'kanmind_shard_token', None)
+            if token is not None:
+                sharding.unpin(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if 'pk' in view_kwargs:
+            request.kanmind_shard_token = sharding.pin(sharding.shard_for_id(view_kwargs['pk']))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:34
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Task = apps.get_model('kan_mind_app', 'Task')
+    Comment = apps.get_model('kan_mind_app', 'Comment')
+    counts = (
+        Comment.objects.filter(task_id=OuterRef('pk'))
+        .order_by()
+        .values('task_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Task.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kan_mind_app', '0012_alter_comment_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def spaced_ranks(count):
+    # Frozen copy of kan_mind_app.ranking.spaced_ranks.
+    width = 1
+    while len(ALPHABET) ** width <= count:
+        width += 1
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * len(ALPHABET) ** width // (count + 1)
+        rank = ''
+        for _ in range(width):
+            value, remainder = divmod(value, len(ALPHABET))
+            rank = ALPHABET[remainder] + rank
+        ranks.append(rank.rstrip('0'))
+    return ranks
+
+
+def backfill_position(apps, schema_editor):
+    Task = apps.get_model('kan_mind_app', 'Task')
+    columns = Task.objects.order_by().values_list('board_id', 'status').distinct()
+    for board_id, status in columns:
+        tasks = list(Task.objects.filter(board_id=board_id, status=status).order_by('id').only('id'))
+        for task, rank in zip(tasks, spaced_ranks(len(tasks))):
+            task.position = rank
+        Task.objects.bulk_update(tasks, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kan_mind_app', '0016_taskevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['board_id', 'status', 'position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_position, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status', 'position'], name='task_board_status_pos_idx'),
+        ),
+    ]
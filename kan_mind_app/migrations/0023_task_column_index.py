@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kan_mind_app', '0022_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status', 'position', 'id'], name='task_board_status_pos_id_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_board_status_pos_idx',
+        ),
+    ]
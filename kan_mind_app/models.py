@@ -1,11 +1,81 @@
 from django.db import models
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+DONE_STATUS = 'done'
+
+
+class BoardScopedQuerySet(models.QuerySet):
+    """
+    QuerySet that scopes rows to the boards a user owns or is a member of.
+
+    Membership is checked with a correlated EXISTS subquery on the board/member
+    table, so access is decided in the same query that fetches the rows.
+    Subclasses set `board_path` to the lookup path from the model to its board.
+    Rows of boards marked as deleted are never returned.
+    """
+    board_path = None
+
+    def _lookup(self, field):
+        return f'{self.board_path}__{field}' if self.board_path else field
+
+    def _membership(self, user):
+        return Exists(Board.members.through.objects.filter(
+            board_id=OuterRef(self._lookup('id')), user_id=user.pk
+        ))
+
+    def _ownership(self, user):
+        return Q(**{self._lookup('user_id'): user.pk})
+
+    def live(self):
+        """Only rows of boards that are not waiting for deletion."""
+        return self.filter(**{self._lookup('deleted_at__isnull'): True})
+
+    def exclude_templates(self):
+        """Leaves out rows of board templates, for listings of actual work."""
+        return self.filter(**{self._lookup('is_template'): False})
+
+    def visible_to(self, user):
+        """Only rows of boards where the user is the owner or a member."""
+        return self.live().filter(self._ownership(user) | self._membership(user))
+
+    def with_access(self, user):
+        """
+        All live rows, annotated with `is_board_owner` and `has_board_access` for the user.
+        Lets detail views tell a missing object (404) from a forbidden one (403).
+        """
+        return self.live().annotate(
+            is_board_owner=ExpressionWrapper(self._ownership(user), output_field=BooleanField()),
+            has_board_access=ExpressionWrapper(
+                self._ownership(user) | self._membership(user), output_field=BooleanField()
+            ),
+        )
+
+
+class BoardQuerySet(BoardScopedQuerySet):
+    board_path = None
+
+
+class TaskQuerySet(BoardScopedQuerySet):
+    board_path = 'board'
+
+
+class CommentQuerySet(BoardScopedQuerySet):
+    board_path = 'task__board'
 
 
 class Board(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
     members = models.ManyToManyField(User, related_name="members")
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    is_template = models.BooleanField(default=False)
+    # Grows with every update, for If-Match checks, see kan_mind_app.versioning.
+    version = models.PositiveIntegerField(default=1)
+
+    objects = BoardQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -21,6 +91,31 @@ class Task(models.Model):
     reviewer = models.ForeignKey(User, on_delete=models.SET_NULL , related_name="reviewed", null=True, blank=True)
     due_date = models.DateField()
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tasks')
+    comment_count = models.PositiveIntegerField(default=0)
+    done_at = models.DateTimeField(null=True, blank=True)
+    # Fractional rank within the (board, status) column, see kan_mind_app.ranking.
+    position = models.CharField(max_length=255, default='', blank=True)
+    # Grows with every update, for If-Match checks, see kan_mind_app.versioning.
+    version = models.PositiveIntegerField(default=1)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['board_id', 'status', 'position', 'id']
+        indexes = [
+            models.Index(fields=['done_at'], name='task_done_at_idx'),
+            models.Index(fields=['board', 'status', 'position', 'id'], name='task_board_status_pos_id_idx'),
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.status == DONE_STATUS and self.done_at is None:
+            self.done_at = timezone.now()
+        elif self.status != DONE_STATUS:
+            self.done_at = None
+        if kwargs.get('update_fields') is not None and 'status' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'done_at'}
+        super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -28,6 +123,145 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="author_comments",null=True, blank=True)
     content = models.TextField(blank=True, null=True)
+
+    objects = CommentQuerySet.as_manager()
     
     class Meta:
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+
+
+class TaskReadMarker(models.Model):
+    """
+    How far a user has read the comment thread of a task, maintained by
+    `kan_mind_app.unread`. Comments with a higher id are unread.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_read_markers')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='read_markers')
+    last_read_comment_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['task', 'user'], name='taskreadmarker_task_user_uniq')]
+
+
+class ArchivedTask(models.Model):
+    """
+    A done task moved out of the Task table by `manage.py archive_tasks`.
+    Keeps the primary key of the original task so it can be restored as is.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='archived_tasks')
+    title = models.CharField(max_length=100)
+    description = models.TextField(max_length=500)
+    status = models.CharField(max_length=100)
+    priority = models.CharField(max_length=100)
+    assignee = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="archived_assigned_tasks", null=True, blank=True)
+    reviewer = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="archived_reviewed", null=True, blank=True)
+    due_date = models.DateField()
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_created_tasks')
+    comment_count = models.PositiveIntegerField(default=0)
+    done_at = models.DateTimeField(null=True, blank=True)
+    position = models.CharField(max_length=255, default='', blank=True)
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TaskQuerySet.as_manager()
+
+
+class ArchivedComment(models.Model):
+    """
+    A comment of an archived task, keeping the primary key of the original comment.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='comments')
+    created_at = models.DateTimeField()
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="archived_author_comments", null=True, blank=True)
+    content = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only activity log entry of a board, written in batches by `kan_mind_app.activity`.
+    `task_id` is a plain column so events outlive deleted and archived tasks.
+    """
+    # Covered by the (board, id) index below.
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='events', db_index=False)
+    task_id = models.BigIntegerField(null=True, blank=True)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='task_events', null=True, blank=True)
+    verb = models.CharField(max_length=50)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['board', 'id'], name='taskevent_board_id_idx')]
+
+
+class Job(models.Model):
+    """
+    A unit of background work in the DB-backed queue of `kan_mind_app.jobs`,
+    processed by `manage.py run_kanmind_worker`.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+
+class BoardNumber(models.Model):
+    """
+    Hands out the global numbers new boards are placed by when the board data
+    is split over several databases, see `kan_mind_app.sharding`.
+    """
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class BoardDirectory(models.Model):
+    """
+    Per-user index of the boards a user owns or is a member of, with the shard
+    database of each board. Kept in the default database next to the users,
+    so cross-board listings only query the shards that hold the user's boards.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='board_directory')
+    board_id = models.BigIntegerField()
+    shard = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['board_id', 'user'], name='boarddirectory_board_user_uniq')]
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored result of a POST sent with an ``Idempotency-Key`` header, replayed
+    to retries of the same user and key, see `kan_mind_app.idempotency`.
+    `status_code` is null while the first request is still running.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='idempotencykey_user_key_uniq')]
+        indexes = [models.Index(fields=['expires_at'], name='idempotencykey_expires_idx')]
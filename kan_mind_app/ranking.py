@@ -0,0 +1,92 @@
+"""
+Fractional ranks for ordering tasks within a column.
+
+A rank is a base-36 fraction written as a string ("i" is 0.5, "i9" a bit
+more), so string order equals numeric order and there is always room for a
+rank between two others. Moving a task only rewrites its own rank; when
+ranks grow long, `rebalance_column` re-spaces the column in the background.
+"""
+from .jobs import enqueue
+from .models import Job, Task
+from .sharding import atomic, use_shard_of
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(ALPHABET)
+REBALANCE_LENGTH = 16
+CHUNK_SIZE = 500
+
+
+def digit(rank, index):
+    return ALPHABET.index(rank[index]) if index < len(rank) else 0
+
+
+def rank_between(before=None, after=None):
+    """
+    Returns a rank strictly between `before` and `after`. Either may be None
+    for the start or the end of the column. Ranks never end in '0', so one
+    rank is never the other plus trailing zeros.
+    """
+    before = before or ''
+    if after is not None and after <= before:
+        raise ValueError(f'Rank {before!r} must sort before {after!r}.')
+
+    result = ''
+    index = 0
+    while True:
+        low = digit(before, index)
+        high = digit(after, index) if after is not None else BASE
+        if high - low > 1:
+            return result + ALPHABET[(low + high) // 2]
+        result += ALPHABET[low]
+        if high - low == 1:
+            # Anything starting with this prefix sorts before `after` now.
+            after = None
+        index += 1
+
+
+def spaced_ranks(count):
+    """`count` evenly spaced ranks of equal width, in ascending order."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * BASE ** width // (count + 1)
+        rank = ''
+        for _ in range(width):
+            value, remainder = divmod(value, BASE)
+            rank = ALPHABET[remainder] + rank
+        ranks.append(rank.rstrip('0'))
+    return ranks
+
+
+def rank_at_end(board_id, status):
+    """A rank after the last task of the column."""
+    last = (
+        Task.objects.filter(board_id=board_id, status=status)
+        .order_by('-position').values_list('position', flat=True).first()
+    )
+    return rank_between(last, None)
+
+
+def needs_rebalance(rank):
+    return len(rank) > REBALANCE_LENGTH
+
+
+def schedule_rebalance(board_id, status):
+    """Queues a rebalance of the column unless one is already pending."""
+    payload = {'board_id': board_id, 'status': status}
+    if not Job.objects.filter(kind='rebalance_column', status=Job.PENDING, payload=payload).exists():
+        enqueue('rebalance_column', **payload)
+
+
+def rebalance_column(board_id, status):
+    """
+    Job handler for 'rebalance_column'. Gives every task of the column an
+    evenly spaced rank, keeping the current order.
+    """
+    with use_shard_of(board_id), atomic():
+        tasks = list(Task.objects.filter(board_id=board_id, status=status).order_by('position', 'id').only('id', 'position'))
+        for task, rank in zip(tasks, spaced_ranks(len(tasks))):
+            task.position = rank
+        Task.objects.bulk_update(tasks, ['position'], batch_size=CHUNK_SIZE)
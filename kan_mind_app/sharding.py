@@ -0,0 +1,223 @@
+"""
+Optional split of the board data over several databases.
+
+With ``KANMIND_SHARDS`` set, every board lives together with its tasks,
+comments, read markers, archive and activity log in one shard database.
+Users, tokens, jobs, idempotency keys and the board directory stay in the
+default database.
+
+The shard is encoded in the high bits of the ids of boards, tasks and
+comments, so any of these ids is enough to find it without a lookup:
+
+- a new board draws a global number from `BoardNumber` and is placed in
+  shard ``number % len(shards)``, its id is ``shard_index << SHARD_BITS | number``;
+- tasks and comments get ids from per-shard sequences that start at
+  ``shard_index << SHARD_BITS`` (`prepare_shard()` runs after migrate).
+
+Requests are pinned to the shard of the id in their url by
+`ShardPinningMiddleware`, and `BoardShardRouter` sends the board models to the
+pinned shard. Cross-board listings run once per shard of the user's boards
+(`fan_out()`) and merge the results.
+
+Without ``KANMIND_SHARDS`` the helpers fall back to the default database and
+nothing else changes.
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+SHARD_BITS = 40
+SHARED_MODELS = {'job', 'boardnumber', 'boarddirectory', 'idempotencykey'}
+
+_current = ContextVar('kanmind_shard', default=None)
+
+
+def shard_aliases():
+    """The database aliases of the shards, empty when sharding is off."""
+    return getattr(settings, 'KANMIND_SHARDS', [])
+
+
+def is_sharded():
+    return bool(shard_aliases())
+
+
+def all_databases():
+    """The databases holding board data."""
+    return shard_aliases() or [DEFAULT_DB_ALIAS]
+
+
+def is_sharded_model(model):
+    meta = model._meta
+    return meta.app_label == 'kan_mind_app' and meta.model_name not in SHARED_MODELS
+
+
+def shard_for_id(object_id):
+    """The shard of a board, task or comment id."""
+    aliases = shard_aliases()
+    return aliases[min(int(object_id) >> SHARD_BITS, len(aliases) - 1)]
+
+
+def db_for_board(board_id):
+    """The database holding the data of the board."""
+    return shard_for_id(board_id) if is_sharded() else DEFAULT_DB_ALIAS
+
+
+def current_db():
+    """The database the board models are routed to right now."""
+    return _current.get() or DEFAULT_DB_ALIAS
+
+
+def pin(alias):
+    """Routes the board models to `alias` until `unpin()` is called with the returned token."""
+    return _current.set(alias)
+
+
+def unpin(token):
+    _current.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    token = pin(alias)
+    try:
+        yield alias
+    finally:
+        unpin(token)
+
+
+def use_shard_of(object_id):
+    """
+    Pins the shard of a board, task or comment id for the block. Does nothing
+    when sharding is off or the id is not a number, so validation can report it.
+    """
+    if not is_sharded():
+        return nullcontext()
+    try:
+        return use_shard(shard_for_id(object_id))
+    except (TypeError, ValueError):
+        return nullcontext()
+
+
+def atomic():
+    """A transaction on the database of the pinned shard."""
+    return transaction.atomic(using=current_db())
+
+
+def fan_out(user, fn):
+    """
+    Calls `fn()` once per database that holds boards of the user, pinned to
+    it, and returns the results in shard order (which is also id order).
+    """
+    results = []
+    for alias in shards_of(user):
+        with use_shard(alias):
+            results.append(fn())
+    return results
+
+
+def allocate_board_id(shard=None):
+    """
+    Reserves the id of a new board, placed in `shard` or in the shard chosen by
+    its global number. Returns None when sharding is off, so the database
+    assigns the id as usual.
+    """
+    if not is_sharded():
+        return None
+    from .models import BoardNumber
+
+    aliases = shard_aliases()
+    number = BoardNumber.objects.create().pk
+    shard = shard or aliases[number % len(aliases)]
+    return (aliases.index(shard) << SHARD_BITS) | number
+
+
+def shards_of(user):
+    """The databases that hold boards the user owns or is a member of."""
+    if not is_sharded():
+        return [DEFAULT_DB_ALIAS]
+    from .models import BoardDirectory
+
+    used = set(BoardDirectory.objects.filter(user=user).values_list('shard', flat=True).distinct())
+    return [alias for alias in shard_aliases() if alias in used]
+
+
+def add_to_directory(board_id, user_ids):
+    if not is_sharded() or not user_ids:
+        return
+    from .models import BoardDirectory
+
+    shard = shard_for_id(board_id)
+    BoardDirectory.objects.bulk_create(
+        [BoardDirectory(user_id=user_id, board_id=board_id, shard=shard) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def remove_from_directory(board_id, user_ids=None):
+    """Drops the directory entries of the board, of all users when `user_ids` is None."""
+    if not is_sharded():
+        return
+    from .models import BoardDirectory
+
+    entries = BoardDirectory.objects.filter(board_id=board_id)
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+
+
+def prepare_shard(using, **kwargs):
+    """
+    post_migrate handler. Moves the id sequences of boards, tasks and comments
+    of a shard to the start of its id range.
+
+    Migrations switch SQLite foreign key checks back on for the open connection;
+    they are switched off again like the ``init_command`` of new connections does,
+    because the users referenced by the board data live in the default database.
+    """
+    aliases = shard_aliases()
+    if using not in aliases:
+        return
+    from .models import Board, Comment, Task
+
+    start = aliases.index(using) << SHARD_BITS
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA foreign_keys = OFF')
+        if not start:
+            return
+        for model in (Board, Task, Comment):
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s', [start, table])
+                if not cursor.rowcount:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                    [table, start],
+                )
+
+
+class BoardShardRouter:
+    """
+    Database router for split board data. The board models go to the database
+    of the instance they belong to or to the pinned shard; everything else
+    stays in the default database. All databases get the full schema.
+    """
+    def db_for_read(self, model, **hints):
+        if not is_sharded_model(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and is_sharded_model(type(instance)) and instance._state.db:
+            return instance._state.db
+        return current_db()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded_model(type(obj1)) and is_sharded_model(type(obj2)):
+            return obj1._state.db == obj2._state.db
+        return True
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import DONE_STATUS, Board, Task
+from .sharding import fan_out
+
+URGENT_PRIORITY = 'high'
+
+
+def summary_cache_key(user_id):
+    return f'kanmind:summary:{user_id}'
+
+
+def build_summary(user):
+    """
+    Computes the dashboard summary for all boards the user owns or is a member of,
+    leaving out board templates.
+
+    All task figures come from one query grouped by (status, priority);
+    the board count is a separate COUNT. With split board data both run once
+    per shard of the user's boards.
+    """
+    today = timezone.localdate()
+    open_tasks = ~Q(status=DONE_STATUS)
+
+    def count_shard():
+        rows = (
+            Task.objects.visible_to(user).exclude_templates()
+            .order_by()
+            .values('status', 'priority')
+            .annotate(
+                count=Count('id'),
+                overdue=Count('id', filter=open_tasks & Q(due_date__lt=today)),
+                assigned=Count('id', filter=Q(assignee_id=user.pk)),
+                reviewing=Count('id', filter=Q(reviewer_id=user.pk)),
+                next_due=Min('due_date', filter=open_tasks & Q(due_date__gte=today)),
+            )
+        )
+        return Board.objects.visible_to(user).exclude_templates().count(), list(rows)
+
+    shards = fan_out(user, count_shard)
+    rows = [row for _, shard_rows in shards for row in shard_rows]
+    summary = {
+        'board_count': sum(board_count for board_count, _ in shards),
+        'task_count': 0,
+        'tasks_by_status': {},
+        'tasks_by_priority': {},
+        'urgent_count': 0,
+        'overdue_count': 0,
+        'assigned_to_me_count': 0,
+        'reviewing_count': 0,
+        'next_due_date': None,
+    }
+    for row in rows:
+        by_status = summary['tasks_by_status']
+        by_priority = summary['tasks_by_priority']
+        by_status[row['status']] = by_status.get(row['status'], 0) + row['count']
+        by_priority[row['priority']] = by_priority.get(row['priority'], 0) + row['count']
+        summary['task_count'] += row['count']
+        summary['overdue_count'] += row['overdue']
+        summary['assigned_to_me_count'] += row['assigned']
+        summary['reviewing_count'] += row['reviewing']
+        if row['priority'] == URGENT_PRIORITY and row['status'] != DONE_STATUS:
+            summary['urgent_count'] += row['count']
+        if row['next_due'] and (summary['next_due_date'] is None or row['next_due'] < summary['next_due_date']):
+            summary['next_due_date'] = row['next_due']
+    return summary
+
+
+def get_summary(user):
+    """Returns the summary of the user, served from a short per-user cache."""
+    key = summary_cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_summary(user)
+        cache.set(key, summary, settings.KANMIND_SUMMARY_CACHE_SECONDS)
+    return summary
+
+
+def invalidate_summaries(board_ids):
+    """
+    Drops the cached summaries of every owner and member of the given boards.
+    Called by the views after writes to boards or their tasks.
+    """
+    user_ids = set()
+    for owner_id, member_id in Board.objects.filter(pk__in=board_ids).values_list('user_id', 'members'):
+        user_ids.add(owner_id)
+        if member_id is not None:
+            user_ids.add(member_id)
+    cache.delete_many([summary_cache_key(user_id) for user_id in user_ids])
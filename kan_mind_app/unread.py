@@ -0,0 +1,67 @@
+from django.db.models import Count, F, FilteredRelation, Max, Q
+from django.utils import timezone
+
+from .models import Comment, TaskReadMarker
+
+
+def unread_counts(user, tasks):
+    """
+    Counts the comments of other users the user has not read yet, for all tasks
+    of the `tasks` queryset in one grouped query. Tasks without unread comments
+    are missing from the returned {task_id: count} dict.
+    """
+    rows = (
+        Comment.objects
+        .annotate(marker=FilteredRelation('task__read_markers', condition=Q(task__read_markers__user=user)))
+        .filter(task__in=tasks.values('pk'))
+        .exclude(author=user)
+        .filter(Q(marker__isnull=True) | Q(id__gt=F('marker__last_read_comment_id')))
+        .order_by()
+        .values('task_id')
+        .annotate(unread=Count('id'))
+    )
+    return {row['task_id']: row['unread'] for row in rows}
+
+
+def add_unread_counts(user, task_rows, tasks):
+    """Sets `unread_comments` on the projected rows of the `tasks` queryset."""
+    counts = unread_counts(user, tasks) if task_rows else {}
+    for row in task_rows:
+        row['unread_comments'] = counts.get(row['id'], 0)
+    return task_rows
+
+
+def mark_read(user, task_id, comment_id):
+    """Moves the marker of the user forward to `comment_id`, never back."""
+    updated = TaskReadMarker.objects.filter(
+        user=user, task_id=task_id, last_read_comment_id__lt=comment_id
+    ).update(last_read_comment_id=comment_id, updated_at=timezone.now())
+    if not updated:
+        TaskReadMarker.objects.bulk_create(
+            [TaskReadMarker(user=user, task_id=task_id, last_read_comment_id=comment_id)],
+            ignore_conflicts=True,
+        )
+
+
+def mark_board_read(user, board_id):
+    """
+    Marks every comment of the board as read for the user with one grouped read
+    and one upsert. Returns the number of tasks with comments.
+    """
+    latest = (
+        Comment.objects.filter(task__board_id=board_id)
+        .order_by()
+        .values('task_id')
+        .annotate(last=Max('id'))
+    )
+    markers = [
+        TaskReadMarker(user=user, task_id=row['task_id'], last_read_comment_id=row['last'])
+        for row in latest
+    ]
+    TaskReadMarker.objects.bulk_create(
+        markers,
+        update_conflicts=True,
+        unique_fields=['task', 'user'],
+        update_fields=['last_read_comment_id', 'updated_at'],
+    )
+    return len(markers)
@@ -0,0 +1,71 @@
+"""
+Optimistic concurrency control for tasks and boards.
+
+Every task and board has a `version` that grows by one with each update and
+is sent to clients as ``ETag``. A client that echoes it in ``If-Match`` gets
+its update applied only if nobody changed the object in between, otherwise
+``412 Precondition Failed``.
+
+Updates are single conditional ``UPDATE ... WHERE id = %s AND version = %s``
+statements that write only the changed columns, so no row locks are held and
+concurrent writes of other columns (ranks, comment counts, deletion marks)
+are never overwritten with stale values.
+"""
+from django.db.models import F, Q
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The object was changed by someone else. Reload it and try again.'
+    default_code = 'precondition_failed'
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def expected_versions(request):
+    """
+    The versions accepted by the ``If-Match`` header of the request, None when
+    any version is fine (no header or ``*``). ``If-Match`` uses the strong
+    comparison (RFC 9110), so weak ``W/`` tags and tags that are not versions
+    of ours can never match and give an empty set.
+    """
+    header = request.headers.get('If-Match') if request is not None else None
+    if not header or header.strip() == '*':
+        return None
+    versions = set()
+    for tag in header.split(','):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isascii() and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+
+def update_versioned(instance, changes, expected=None):
+    """
+    Writes `changes` (values or expressions) to the row of `instance` and bumps
+    its version, in one UPDATE that only matches the `expected` versions when
+    given. Raises `PreconditionFailed` on a version conflict and NotFound when
+    the row is gone. Updates `instance` with the written values.
+    """
+    if expected is not None and instance.version not in expected:
+        raise PreconditionFailed()
+    condition = Q(pk=instance.pk)
+    if expected is not None:
+        condition &= Q(version__in=expected)
+    if not type(instance)._default_manager.filter(condition).update(**changes, version=F('version') + 1):
+        if expected is not None:
+            raise PreconditionFailed()
+        raise NotFound()
+
+    computed = ['version']
+    for name, value in changes.items():
+        if hasattr(value, 'resolve_expression'):
+            computed.append(name)
+        else:
+            setattr(instance, name, value)
+    instance.refresh_from_db(fields=computed)
+    return instance
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+
+class LoadSheddingMiddleware:
+    """
+    Rejects low-priority reads with 429 and Retry-After while the process is
+    overloaded, before authentication or any database work happens.
+
+    The process counts as overloaded when more requests are in flight than
+    `MAX_IN_FLIGHT`, or when the p95 latency of the requests of the last
+    `WINDOW` seconds (at most `SAMPLE_SIZE` of them) exceeds `P95_MS`.
+    Low-priority routes are the url names listed in `LOW_PRIORITY_ROUTES`;
+    writes are never shed.
+
+    While reads are shed for latency, one in `PROBE_EVERY` of them is let
+    through as a probe, and samples older than the window expire, so p95
+    follows the current latency and shedding stops once it recovers.
+    """
+    # Recompute p95 at least after this many new samples or seconds.
+    recompute_samples = 20
+    recompute_seconds = 1.0
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.KANMIND_LOAD_SHEDDING
+        self.max_in_flight = config['MAX_IN_FLIGHT']
+        self.p95_limit = config['P95_MS'] / 1000
+        self.window = config['WINDOW']
+        self.probe_every = config['PROBE_EVERY']
+        self.retry_after = config['RETRY_AFTER']
+        self.low_priority = set(config['LOW_PRIORITY_ROUTES'])
+        # (finished at, seconds) of the latest requests, oldest first.
+        self.latencies = deque(maxlen=config['SAMPLE_SIZE'])
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.p95 = 0.0
+        self.new_samples = 0
+        self.computed_at = 0.0
+        self.shed = 0
+
+    def __call__(self, request):
+        if self.is_low_priority(request) and self.should_shed():
+            response = JsonResponse(
+                {'detail': 'Server is busy, please retry later.'}, status=429
+            )
+            response['Retry-After'] = str(self.retry_after)
+            return response
+
+        with self.lock:
+            self.in_flight += 1
+        start = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            self.record(start, time.monotonic())
+
+    def is_low_priority(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            return resolve(request.path_info).url_name in self.low_priority
+        except Resolver404:
+            return False
+
+    def should_shed(self):
+        with self.lock:
+            if self.in_flight >= self.max_in_flight:
+                return True
+            self.refresh_p95(time.monotonic())
+            if self.p95 <= self.p95_limit:
+                self.shed = 0
+                return False
+            self.shed += 1
+            return self.shed % self.probe_every != 0
+
+    def record(self, start, end):
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append((end, end - start))
+            self.new_samples += 1
+
+    def refresh_p95(self, now):
+        """Drops expired samples and recomputes p95 when the window has moved enough. Needs the lock."""
+        if self.new_samples < self.recompute_samples and now - self.computed_at < self.recompute_seconds:
+            return
+        while self.latencies and self.latencies[0][0] < now - self.window:
+            self.latencies.popleft()
+        # Sorting a few hundred floats is cheap, but not needed on every request.
+        ordered = sorted(elapsed for _, elapsed in self.latencies)
+        self.p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)] if ordered else 0.0
+        self.new_samples = 0
+        self.computed_at = now
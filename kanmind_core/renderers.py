@@ -0,0 +1,36 @@
+"""
+JSON renderer that uses orjson (pinned in requirements.txt) when it is installed.
+
+Falls back to DRF's stdlib-based `JSONRenderer` when orjson is missing or
+when indented output is requested (e.g. by the browsable API).
+"""
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders compact JSON with orjson. `date`, `datetime` and `UUID` values are
+    encoded natively; everything else orjson does not know goes through DRF's
+    `JSONEncoder`, so lazy strings, decimals and querysets keep working.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_UTC_Z)
+        # Same strict javascript subset as DRF's renderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
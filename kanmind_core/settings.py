@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'kanmind_core.middleware.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'kan_mind_app.middleware.ActivityLogMiddleware',
 ]
 
 ROOT_URLCONF = 'kanmind_core.urls'
@@ -81,6 +84,22 @@ DATABASES = {
     }
 }
 
+# Optional split of the board data over several SQLite files, see kan_mind_app/sharding.py.
+# With KANMIND_SHARD_COUNT=N the boards with their tasks and comments go to shard_0 ... shard_<N-1>;
+# users, tokens and jobs stay in the default database. Start with empty databases and run
+# `manage.py migrate --database=<alias>` for every alias.
+KANMIND_SHARDS = [f'shard_{index}' for index in range(int(os.environ.get('KANMIND_SHARD_COUNT', '0')))]
+for alias in KANMIND_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+        # Users live in the default database, so foreign keys to them cannot be enforced here.
+        'OPTIONS': {'init_command': 'PRAGMA foreign_keys = OFF'},
+    }
+if KANMIND_SHARDS:
+    DATABASE_ROUTERS = ['kan_mind_app.sharding.BoardShardRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('kan_mind_app.middleware.ActivityLogMiddleware'), 'kan_mind_app.middleware.ShardPinningMiddleware')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -123,5 +142,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
-    ]
-}
\ No newline at end of file
+    ],
+    # The Fast* classes use orjson when installed and fall back to the stdlib.
+    # Swap in 'rest_framework.renderers.JSONRenderer' / 'rest_framework.parsers.JSONParser'
+    # to go back to DRF's defaults.
+    'DEFAULT_RENDERER_CLASSES': [
+        'kanmind_core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'kanmind_core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # In-memory sliding windows per auth token (or IP when anonymous), see kanmind_core/throttling.py.
+    # 'user'/'anon' are the overall budgets, the other scopes are per-endpoint budgets (view.throttle_scope).
+    'DEFAULT_THROTTLE_CLASSES': [
+        'kanmind_core.throttling.TokenRateThrottle',
+        'kanmind_core.throttling.EndpointRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'anon': '60/min',
+        'login': '10/min',
+        'registration': '5/min',
+        'tasks': '120/min',
+    },
+}
+
+# Sheds low-priority reads with 429 while the process is overloaded, see kanmind_core/middleware.py.
+KANMIND_LOAD_SHEDDING = {
+    'MAX_IN_FLIGHT': 32,
+    'P95_MS': 2000,
+    'SAMPLE_SIZE': 200,
+    # Latency samples older than this many seconds no longer count towards p95.
+    'WINDOW': 30,
+    # While reads are shed for latency, every PROBE_EVERY-th one still runs to measure recovery.
+    'PROBE_EVERY': 20,
+    'RETRY_AFTER': 2,
+    'LOW_PRIORITY_ROUTES': [
+        'tasks-list', 'tasks-assigned', 'tasks-review', 'board-list', 'board-activity', 'summary',
+    ],
+}
+
+# Limits of POST /api/batch/, see kan_mind_app/batch.py.
+KANMIND_BATCH = {
+    'MAX_REQUESTS': 20,
+    # Threads for consecutive read-only sub-requests of non-atomic batches.
+    'MAX_WORKERS': 4,
+}
+
+# Idempotency-Key handling of task and comment creation, see kan_mind_app/idempotency.py.
+KANMIND_IDEMPOTENCY = {
+    # Seconds a stored response is replayed to retries.
+    'TTL': 24 * 60 * 60,
+    # Seconds after which an unfinished first request counts as crashed and its key is taken over.
+    'LOCK_TIMEOUT': 60,
+    # Seconds a concurrent duplicate waits for the first request before getting 409.
+    'WAIT': 5,
+}
+
+# Member search (/api/users/search/), see kan_mind_app/member_search.py.
+KANMIND_USER_SEARCH = {
+    'MAX_RESULTS': 20,
+    # Seconds results are cached per user and query, also sent as Cache-Control max-age.
+    'CACHE_SECONDS': 30,
+}
+
+# Seconds the per-user dashboard summary (/api/summary/) is cached.
+KANMIND_SUMMARY_CACHE_SECONDS = 60
+
+# Done tasks older than this many days are moved to the archive by `manage.py archive_tasks`.
+KANMIND_ARCHIVE_AFTER_DAYS = 30
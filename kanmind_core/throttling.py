@@ -0,0 +1,140 @@
+"""
+In-memory request throttling.
+
+The throttles keep a sliding window counter per (scope, client) in process
+memory instead of DRF's cache-backed timestamp lists, so a check is a dict
+lookup and two integer updates. Limits apply per worker process.
+Clients are identified by their auth token, or by IP when anonymous.
+"""
+import threading
+import time
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindow:
+    """
+    Sliding window counter: the count of the previous fixed window is weighted
+    by how much of it still overlaps the sliding window.
+    """
+    __slots__ = ('start', 'previous', 'current')
+
+    def __init__(self, start):
+        self.start = start
+        self.previous = 0
+        self.current = 0
+
+    def roll(self, now, duration):
+        elapsed_windows = int((now - self.start) // duration)
+        if elapsed_windows:
+            self.previous = self.current if elapsed_windows == 1 else 0
+            self.current = 0
+            self.start += elapsed_windows * duration
+
+    def estimate(self, now, duration):
+        overlap = 1 - (now - self.start) / duration
+        return self.previous * overlap + self.current
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Base class of the KanMind throttles. Subclasses define the scope and the
+    client identity through `get_cache_key()`, like DRF's throttles.
+    """
+    timer = time.monotonic
+    windows = {}
+    lock = threading.Lock()
+    prune_every = 1000
+    calls = 0
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        with self.lock:
+            self.prune()
+            window = self.windows.get(self.key)
+            if window is None:
+                window = self.windows[self.key] = SlidingWindow(self.now)
+            window.roll(self.now, self.duration)
+            self.estimate = window.estimate(self.now, self.duration)
+            self.window = (window.start, window.previous, window.current)
+            if self.estimate >= self.num_requests:
+                return self.throttle_failure()
+            window.current += 1
+        return True
+
+    def prune(self):
+        """Drops windows that have been idle for longer than two periods."""
+        SlidingWindowRateThrottle.calls += 1
+        if SlidingWindowRateThrottle.calls % self.prune_every:
+            return
+        for key, window in list(self.windows.items()):
+            if self.now - window.start > 2 * self.duration_of(key):
+                del self.windows[key]
+
+    def duration_of(self, key):
+        return self.parse_rate(self.THROTTLE_RATES.get(key.split(':', 1)[0]))[1] or self.duration
+
+    def wait(self):
+        """Seconds until the weighted count drops below the limit."""
+        start, previous, current = self.window
+        remaining = self.duration - (self.now - start)
+        if previous:
+            # The previous window fades out linearly during the current one.
+            needed = (self.estimate - self.num_requests) / previous * self.duration
+            if needed < remaining:
+                return max(needed, 1)
+        # Otherwise wait for the next window, in which `current` fades out.
+        return max(remaining + self.duration * max(0, 1 - self.num_requests / max(current, 1)), 1)
+
+    def get_ident(self, request):
+        auth = getattr(request, 'auth', None)
+        if auth is not None and getattr(auth, 'key', None):
+            return f'token-{auth.key}'
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{super().get_ident(request)}'
+
+
+class TokenRateThrottle(SlidingWindowRateThrottle):
+    """
+    Overall budget per client: the 'user' rate per auth token and the 'anon'
+    rate per IP address.
+    """
+    def __init__(self):
+        # The scope depends on the request, see allow_request().
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = 'user' if request.user and request.user.is_authenticated else 'anon'
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:{self.get_ident(request)}'
+
+
+class EndpointRateThrottle(SlidingWindowRateThrottle):
+    """
+    Budget per client and endpoint for views with a `throttle_scope`.
+    Views without a scope, or scopes without a configured rate, are not limited.
+    """
+    def __init__(self):
+        # The rate depends on the view, see allow_request().
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        self.rate = self.THROTTLE_RATES.get(self.scope) if self.scope else None
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:{self.get_ident(request)}'
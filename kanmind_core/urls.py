@@ -16,11 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from kan_mind_app.api.views import BatchView, SummaryView, UserSearch
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/boards/', include('kan_mind_app.api.urls')),
     path('api/tasks/', include('kan_mind_app.api.urls-tasks')),
+    path('api/summary/', SummaryView.as_view(), name='summary'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('api/users/search/', UserSearch.as_view(), name='user-search'),
     path('api/email-check/', include('user_auth_app.api.urls')),
     path('api/', include('user_auth_app.api.urls')),
     path('api_auth', include('rest_framework.urls')),
@@ -119,6 +119,6 @@ class RegistrationSerializer(serializers.ModelSerializer):
             serializers.ValidationError({'detail': 'Fullname already exists'}) 
         
         account.set_password(pw)
+        # The profile is created by the post_save handler `sync_profile()`.
         account.save()
-        profile = UserProfile.objects.create(user=account)
         return account
\ No newline at end of file
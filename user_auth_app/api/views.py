@@ -1,5 +1,5 @@
 from rest_framework import generics, status
-from user_auth_app.models import UserProfile
+from user_auth_app.models import UserProfile, normalize
 from .serializers import UserProfileSerializer, RegistrationSerializer, EmailAuthTokenSerializer
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
@@ -7,6 +7,7 @@ from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from django.contrib.auth.models import User
+from rest_framework.settings import api_settings
 
 class UserProfileList(generics.ListCreateAPIView):
     queryset = UserProfile.objects.all()
@@ -32,6 +33,8 @@ class CustomLoginView(ObtainAuthToken):
     """
     permission_classes = [AllowAny]
     serializer_class = EmailAuthTokenSerializer
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'login'
 
     def post(self, request):
         serializer = self.serializer_class(data = request.data)
@@ -59,6 +62,7 @@ class RegistrationView(APIView):
     Handles creation of user accounts, including username validation. Returns the created user data.
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'registration'
 
     def post(self, request):
         serializer = RegistrationSerializer(data = request.data)
@@ -85,24 +89,28 @@ class RegistrationView(APIView):
     
     
 class EmailCheckView(APIView):
+    """
+    API endpoint for checking whether an email belongs to a registered user.
+
+    Looks the email up case-insensitively through the indexed normalized
+    email of the user profiles.
+    """
     permission_classes = [IsAuthenticated] 
 
     def get(self, request):   
         email = request.query_params.get('email')
-        user = User.objects.get(email=email)
-
         if not email:
             return Response({"detail": "Email query parameter is required."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            data = {
-                "id": user.id,
-                "email": user.email,
-                "fullname": user.username,
-            }        
-        except User.DoesNotExist:
+        user = User.objects.filter(userprofile__normalized_email=normalize(email)).order_by('id').first()
+        if user is None:
             return Response({"detail": "User not found."},
                             status=status.HTTP_404_NOT_FOUND) 
-        
+
+        data = {
+            "id": user.id,
+            "email": user.email,
+            "fullname": user.username,
+        }        
         return Response(data)
\ No newline at end of file
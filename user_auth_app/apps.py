@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save
 
 
 class UserAuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user_auth_app'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from .models import sync_profile
+        post_save.connect(sync_profile, sender=User, dispatch_uid='user_auth_app.sync_profile')
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+def fill_search_columns(apps, schema_editor):
+    """Creates missing profiles and fills the normalized columns of every user."""
+    User = apps.get_model('auth', 'User')
+    UserProfile = apps.get_model('user_auth_app', 'UserProfile')
+    db = schema_editor.connection.alias
+    profiles = {profile.user_id: profile for profile in UserProfile.objects.using(db).all()}
+    missing, changed = [], []
+    for user in User.objects.using(db).only('id', 'email', 'username').iterator():
+        profile = profiles.get(user.pk) or UserProfile(user_id=user.pk)
+        profile.normalized_email = (user.email or '').strip().casefold()
+        profile.normalized_name = (user.username or '').strip().casefold()
+        (changed if profile.pk else missing).append(profile)
+    UserProfile.objects.using(db).bulk_create(missing, batch_size=500)
+    UserProfile.objects.using(db).bulk_update(changed, ['normalized_email', 'normalized_name'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth_app', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='normalized_email',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
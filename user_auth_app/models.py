@@ -2,8 +2,31 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+
+def normalize(value):
+    """The form names and emails are searched in: trimmed and case-folded."""
+    return (value or '').strip().casefold()
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Normalized copies of the email and the fullname (username) for indexed
+    # exact and prefix lookups, kept in sync by `sync_profile()`.
+    normalized_email = models.CharField(max_length=254, blank=True, db_index=True, editable=False)
+    normalized_name = models.CharField(max_length=150, blank=True, db_index=True, editable=False)
 
     def __str__(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+
+def sync_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    post_save handler of User. Creates the profile of new users and refreshes
+    the normalized columns when the email or the username was saved.
+    """
+    if update_fields is not None and not {'email', 'username'} & set(update_fields):
+        return
+    UserProfile.objects.update_or_create(
+        user=instance,
+        defaults={'normalized_email': normalize(instance.email), 'normalized_name': normalize(instance.username)},
+    )